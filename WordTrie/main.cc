@@ -7,6 +7,31 @@
 
 using json = nlohmann::json;
 
+// Answer a single {"command", "type", "string"} query.
+json runQuery(const WordTrie& trie, const json& input) {
+  std::string command = input.at("command");
+  std::string type = input.at("type");
+  std::string string = input.at("string");
+  json output;
+
+  if (command == "search" && type == "prefix") {
+    std::vector<int> results = trie.searchPrefix(string);
+    output = results;
+  } else if (command == "search" && type == "suffix") {
+    std::vector<int> results = trie.searchSuffix(string);
+    output = results;
+  } else if (command == "count" && type == "prefix") {
+    int count = trie.countWordsWithPrefix(string);
+    output = {{"count", count}};
+  } else if (command == "count" && type == "suffix") {
+    int count = trie.countWordsWithSuffix(string);
+    output = {{"count", count}};
+  } else {
+    output = {{"error", "Invalid command"}};
+  }
+  return output;
+}
+
 int main() {
   // Load the suffix trie once
   WordTrie trie("dictionary/english-words.all");
@@ -17,25 +42,21 @@ int main() {
     try {
       // Parse input JSON
       json input = json::parse(line);
-      std::string command = input["command"];
-      std::string type = input["type"];
-      std::string string = input["string"];
       json output;
 
-      if (command == "search" && type == "prefix") {
-        std::vector<int> results = trie.searchPrefix(string);
-        output = results;
-      } else if (command == "search" && type == "suffix") {
-        std::vector<int> results = trie.searchSuffix(string);
-        output = results;
-      } else if (command == "count" && type == "prefix") {
-        int count = trie.countWordsWithPrefix(string);
-        output = {{"count", count}};
-      } else if (command == "count" && type == "suffix") {
-        int count = trie.countWordsWithSuffix(string);
-        output = {{"count", count}};
+      if (input.contains("batch")) {
+        // {"batch": [query, ...]} -> [result, ...], one line for the lot, so a
+        // caller pays one write/flush/readline per batch instead of per query.
+        output = json::array();
+        for (const json& query : input.at("batch")) {
+          try {
+            output.push_back(runQuery(trie, query));
+          } catch (const std::exception& e) {
+            output.push_back({{"error", "Invalid input"}});
+          }
+        }
       } else {
-        output = {{"error", "Invalid command"}};
+        output = runQuery(trie, input);
       }
 
       // Output JSON response
@@ -0,0 +1,282 @@
+"""
+Benchmarks on reproducible synthetic many-time-pad corpora.
+
+Each case draws N plaintexts of a given length from the common dictionary
+tiers, encrypts them under one random keystream, and times the pipeline stages
+(`auto_crib_drag`, `reconstruct`, `iterative_recover`). Since the true keystream
+is known, every stage is also scored: how much of it was recovered, and how
+much of that is right. A set of micro-benchmarks times WordIndex and trie
+queries on their own.
+
+Results are written as JSON. Given a baseline (an earlier results file), any
+timing that got slower than the tolerance allows, or any recovery figure that
+dropped, is reported as a regression and the exit status is 1.
+
+    python bench.py                                  # default cases
+    python bench.py --cases 3x256 6x512 --seed 7
+    python bench.py --save-baseline bench-baseline.json
+    python bench.py --baseline bench-baseline.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+# Benchmarks time cold runs: keep the trie query cache off disk.
+os.environ.setdefault("WORDTRIE_CACHE_DIR", "")
+
+from utils import load_words, load_short_words
+from xor_helpers import XorMatrix, get_trie, clear_command_cache
+from decrypt import auto_crib_drag
+from reconstruct import reconstruct
+from expand import iterative_recover, WordIndex
+from wordlist import load_dictionary
+
+FULL_DICTIONARY = "dictionary/english-words.all"
+# Plaintext vocabulary: the most common words, as real messages mostly are.
+TIERS = ("dictionary/english-words.10", "dictionary/english-words.20")
+CRIB_TIER = "dictionary/english-words.10"
+MIN_CRIB_LEN = 4
+MIN_VOTES = 2
+DEFAULT_CASES = ("3x256", "5x256", "8x512")
+# Fractional slowdown of a timing, and drop in percentage points of a recovery
+# figure, tolerated before it counts as a regression.
+TOLERANCE = 0.25
+PCT_TOLERANCE = 0.5
+# Timings shorter than this are too noisy to flag.
+MIN_SECONDS = 0.01
+MIN_MICROSECONDS = 0.5
+
+
+def synthetic_plaintexts(n, length, rng, vocabulary):
+    """
+    `n` plaintexts of exactly `length` characters: capitalised sentences of
+    dictionary words, with the odd comma and a closing '.', '?' or '!'.
+    """
+    plaintexts = []
+    for _ in range(n):
+        text = []
+        size = 0
+        while size < length:
+            words = rng.choices(vocabulary, k=rng.randint(4, 12))
+            words[0] = words[0].capitalize()
+            for k in range(1, len(words) - 1):
+                if rng.random() < 0.08:
+                    words[k] += ","
+            sentence = " ".join(words) + rng.choice(".....?!") + " "
+            text.append(sentence)
+            size += len(sentence)
+        plaintexts.append("".join(text)[:length].encode("ascii"))
+    return plaintexts
+
+
+def synthetic_corpus(n, length, seed, vocabulary):
+    """(plaintexts, keystream, ciphertexts) for one case, fixed by `seed`."""
+    rng = random.Random(f"{seed}:{n}x{length}")
+    plaintexts = synthetic_plaintexts(n, length, rng, vocabulary)
+    keystream = rng.randbytes(length)
+    ciphertexts = [bytes(p ^ k for p, k in zip(pt, keystream))
+                   for pt in plaintexts]
+    return plaintexts, keystream, ciphertexts
+
+
+def _score(result, keystream):
+    """Recovered and correct shares of the keystream, in percent."""
+    length = len(keystream)
+    known = [p for p in range(length) if result["known"][p]]
+    correct = sum(1 for p in known if result["key"][p] == keystream[p])
+    return {
+        "recovered_pct": 100.0 * len(known) / length,
+        "correct_pct": 100.0 * correct / length,
+        "accuracy_pct": 100.0 * correct / len(known) if known else 0.0,
+    }
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def run_case(n, length, seed, vocabulary, cribs, full_dict, index, repeat=1):
+    """
+    Run the pipeline over one synthetic corpus; timings (best of `repeat`
+    runs, each from cold caches) and scores.
+    """
+    _, keystream, ciphertexts = synthetic_corpus(n, length, seed, vocabulary)
+    drag_s = reconstruct_s = expand_s = float("inf")
+    for _ in range(repeat):
+        clear_command_cache()
+        index.clear_caches()
+        matches, t = _timed(auto_crib_drag, cribs, XorMatrix(ciphertexts),
+                            length, n, full_dict, persist=False)
+        drag_s = min(drag_s, t)
+        matches.sort(key=lambda m: (m["plaintext"], m["start"], m["crib"]))
+        basic, t = _timed(reconstruct, matches, ciphertexts, MIN_VOTES)
+        reconstruct_s = min(reconstruct_s, t)
+        result, t = _timed(iterative_recover, matches, ciphertexts, index,
+                           min_votes=MIN_VOTES, log=lambda *a: None)
+        expand_s = min(expand_s, t)
+    case = {"n": n, "length": length, "matches": len(matches),
+            "crib_drag_s": drag_s, "reconstruct_s": reconstruct_s,
+            "expand_s": expand_s}
+    case.update({f"reconstruct_{k}": v
+                 for k, v in _score(basic, keystream).items()})
+    case.update({f"expand_{k}": v for k, v in _score(result, keystream).items()})
+    return case
+
+
+def _per_call_us(fn, args, repeat, reset=None):
+    """
+    Mean microseconds per call of `fn` over `args`, best of `repeat` rounds;
+    `reset` runs before each round (e.g. to start from cold caches).
+    """
+    best = None
+    for _ in range(repeat):
+        if reset is not None:
+            reset()
+        start = time.perf_counter()
+        for a in args:
+            fn(*a)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return 1e6 * best / max(len(args), 1)
+
+
+def run_micro(seed, vocabulary, count=2000, repeat=5):
+    """Micro-timings of WordIndex and trie queries on random patterns."""
+    rng = random.Random(f"{seed}:micro")
+    compiled = load_dictionary(FULL_DICTIONARY)
+    start = time.perf_counter()
+    index = WordIndex.from_dictionary(compiled)
+    build_s = time.perf_counter() - start
+    index.build_postings()  # time queries, not the lazy index build
+
+    words = rng.choices(vocabulary, k=count)
+
+    def holes(word, p):
+        return tuple(None if rng.random() < p else c for c in word)
+
+    patterns = [(holes(w, 0.4),) for w in words]
+    constraints = [(len(w), [(i, c) for i, c in enumerate(w)
+                             if rng.random() < 0.6]) for w in words]
+    tokens = [(holes(" ".join(rng.choices(vocabulary, k=rng.randint(2, 4))),
+                     0.5),) for _ in range(count)]
+    trie = get_trie()
+    fragments = [(w[:rng.randint(1, len(w))],) for w in words]
+    cold = index.clear_caches
+    return {
+        "index_build_s": build_s,
+        "is_word_us": _per_call_us(index.is_word, [(w,) for w in words], repeat),
+        "word_matches_us": _per_call_us(index.word_matches, patterns, repeat),
+        "candidates_us": _per_call_us(
+            lambda length, cons: index.candidates(length, cons, 1), constraints,
+            repeat),
+        "token_satisfiable_us": _per_call_us(index.token_satisfiable, tokens,
+                                             repeat, cold),
+        "trie_count_prefix_us": _per_call_us(trie.count_prefix, fragments,
+                                             repeat),
+        "trie_count_suffix_us": _per_call_us(trie.count_suffix, fragments,
+                                             repeat),
+    }
+
+
+def compare(current, baseline, tolerance=TOLERANCE):
+    """
+    Regressions of `current` against `baseline` (both results dicts), as
+    human-readable lines. Only figures present in both are compared.
+    """
+    regressions = []
+    sections = [("micro", current.get("micro", {}), baseline.get("micro", {}))]
+    sections += [(name, case, baseline.get("cases", {}).get(name, {}))
+                 for name, case in current.get("cases", {}).items()]
+    for name, now, before in sections:
+        for key, value in now.items():
+            old = before.get(key)
+            if old is None or not isinstance(value, (int, float)):
+                continue
+            if key.endswith("_s") or key.endswith("_us"):
+                floor = MIN_SECONDS if key.endswith("_s") else MIN_MICROSECONDS
+                if value > old * (1 + tolerance) and value - old > floor:
+                    regressions.append(f"{name}.{key}: {old:.4g} -> {value:.4g} "
+                                       f"({value / old - 1:+.0%})")
+            elif key.endswith("_pct") and value < old - PCT_TOLERANCE:
+                regressions.append(f"{name}.{key}: {old:.1f}% -> {value:.1f}%")
+    return regressions
+
+
+def _parse_case(text):
+    n, length = text.lower().split("x")
+    return int(n), int(length)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--cases", nargs="*", default=list(DEFAULT_CASES),
+                        help="corpora to run, as NxLENGTH (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-micro", action="store_true",
+                        help="skip the WordIndex/trie micro-benchmarks")
+    parser.add_argument("--output", default="bench-results.json")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--save-baseline", metavar="PATH",
+                        help="also write the results to PATH as a baseline")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="runs per case; the best timing is kept")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args(argv)
+
+    vocabulary = sorted({w for tier in TIERS for w in load_words(tier)
+                         if w.isascii() and w.isalpha()}
+                        | load_short_words(TIERS[0]))
+    cribs = {w for w in load_words(CRIB_TIER) if len(w) >= MIN_CRIB_LEN}
+    full_dict = load_words(FULL_DICTIONARY) | load_short_words(FULL_DICTIONARY)
+    index = WordIndex.from_dictionary(load_dictionary(FULL_DICTIONARY))
+    get_trie()  # load it now so the first case's timings don't include that
+
+    results = {
+        "meta": {"python": platform.python_version(),
+                 "machine": platform.machine(), "seed": args.seed,
+                 "repeat": args.repeat,
+                 "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "cases": {},
+    }
+    for spec in args.cases:
+        n, length = _parse_case(spec)
+        case = run_case(n, length, args.seed, vocabulary, cribs, full_dict,
+                        index, args.repeat)
+        results["cases"][spec] = case
+        print(f"{spec}: drag {case['crib_drag_s']:.2f}s, reconstruct "
+              f"{case['reconstruct_s']:.3f}s, expand {case['expand_s']:.2f}s; "
+              f"recovered {case['expand_recovered_pct']:.1f}% "
+              f"({case['expand_accuracy_pct']:.1f}% correct)")
+    if not args.no_micro:
+        results["micro"] = run_micro(args.seed, vocabulary)
+        print("micro: " + ", ".join(
+            f"{k} {v:.3g}" for k, v in results["micro"].items()))
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w") as out:
+            json.dump(results, out, indent=2)
+    print(f"Wrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as infile:
+            baseline = json.load(infile)
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
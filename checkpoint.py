@@ -0,0 +1,62 @@
+import hashlib
+import os
+import pickle
+
+# Bump when the saved state's layout changes; older files are then ignored.
+VERSION = 1
+
+
+def run_key(ciphertexts, **params):
+    """
+    Hex digest identifying one recovery run: the ciphertext set plus every
+    parameter that shapes its result. Progress is only ever resumed into a run
+    with the same key.
+    """
+    digest = hashlib.sha256()
+    for ct in ciphertexts:
+        digest.update(len(ct).to_bytes(8, "little"))
+        digest.update(ct)
+    digest.update(repr(sorted(params.items())).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class RecoveryCheckpoint:
+    """
+    On-disk snapshot of an `iterative_recover` run's progress.
+
+    The state is a plain dict (votes, committed and blocked bytes, interactive
+    skips, and how far through the passes the run got), rewritten atomically
+    after every step, so an interrupted run loses at most the step in flight.
+    """
+
+    def __init__(self, directory, key):
+        self.path = os.path.join(directory, f"recover-{key[:16]}.pkl")
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self):
+        """The saved state, or None if there is none (or it can't be read)."""
+        try:
+            with open(self.path, 'rb') as infile:
+                state = pickle.load(infile)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if not isinstance(state, dict) or state.get("version") != VERSION:
+            return None
+        return state
+
+    def save(self, state):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as out:
+            pickle.dump(dict(state, version=VERSION), out,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.path)
+        return self.path
+
+    def discard(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -1,9 +1,24 @@
-from xor_helpers import generate_xor_labels, generate_xor_slices, potential_match
-from utils import is_printable_ascii
+import os
+import time
+from collections import defaultdict
+from multiprocessing.util import Finalize
+from xor_helpers import (generate_xor_labels, potential_match, CiphertextSet,
+                         byte_class_masks, plausible_offsets, iter_bits,
+                         save_command_cache, command_cache_stats)
+from utils import is_printable_ascii, PLAUSIBLE_BYTES
+from reconstruct import VoteTally, AdmissibleKeys
+from seeding import seed_keystream, resolved_columns
+import profiling
 from pprint import pprint
 
 
-def auto_crib_drag(words, xor_data, len_ct, num_ct, dict):
+# Relative cost of validating one surviving window against the dictionary,
+# in units of one mask AND (see `crib_cost`).
+VALIDATION_COST = 200
+
+
+def auto_crib_drag(words, matrix, len_ct, num_ct, dict, masks=None,
+                   persist=True, tally=None, resolved=0):
     """
     Automatically crib drags words over the XOR'd ciphertexts.
     There are three scenarios we could come across during this,
@@ -11,23 +26,189 @@ def auto_crib_drag(words, xor_data, len_ct, num_ct, dict):
         a. deciphers entire words in the plaintexts.
         b. deciphers portions of words in the plaintexts.
         c. yields complete gibberish.
+
+    `matrix` is the XorMatrix of the ciphertexts, or for large sets their
+    CiphertextSet, which needs no pair store. `masks` may be passed in
+    (from `byte_class_masks` or `AdmissibleKeys.offset_masks`) to reuse them
+    across calls. With persist=False the trie query cache is neither reported
+    nor saved, leaving that to the caller (see `drag_batch`). If a VoteTally is
+    passed as `tally`, matches are folded into it as they are found and the
+    tally is returned instead of a list of matches.
+
+    `resolved` is a bit vector of columns whose key byte is already known
+    (see `seeding.resolved_columns`); placements entirely within them are
+    skipped.
     """
 
-    labels = generate_xor_labels(xor_data)
     matches = []
 
-    for word in sorted(words):
-        crib = word.encode("utf-8")
-        crib_len = len(crib)
-        max_offset = len_ct - crib_len + 1  # +1 since range is exclusive
+    # Every offset of every pair is screened at once per crib: the byte-class
+    # masks reject any placement that derives an impossible byte in some other
+    # message, so only surviving (crib, offset, plaintext) windows reach the
+    # (expensive) dictionary validation in `potential_match`.
+    if masks is None:
+        masks = byte_class_masks(matrix)
+    by_len = defaultdict(list)
+    for word in words:
+        by_len[len(word.encode("utf-8"))].append(word)
+
+    for crib_len in sorted(by_len):
+        for word in sorted(by_len[crib_len]):
+            crib = word.encode("utf-8")
 
-        # # Debugging purposes
-        # print(f"Crib dragging '{crib}' across {labels}")
+            # # Debugging purposes
+            # print(f"Crib dragging '{crib}' across "
+            #       f"{generate_xor_labels(matrix.as_dict())}")
 
-        for offset in range(max_offset):
-            xor_slices = generate_xor_slices(xor_data, offset, crib_len)
-            matches_found = potential_match(xor_slices, crib, offset, dict)
-            matches.extend(matches_found)
+            start = time.perf_counter() if profiling.ENABLED else 0.0
+            by_offset = defaultdict(list)
+            for outer, alive in enumerate(
+                    plausible_offsets(masks, crib, len_ct, resolved)):
+                for offset in iter_bits(alive):
+                    by_offset[offset].append(outer)
+            if profiling.ENABLED:
+                screened = time.perf_counter()
+                profiling.add_time("drag.screen", screened - start)
+                profiling.count("drag.cribs")
+                profiling.count("drag.windows",
+                                sum(len(o) for o in by_offset.values()))
+            for offset in sorted(by_offset):
+                matches_found = potential_match(matrix, crib, offset, dict,
+                                                by_offset[offset])
+                if profiling.ENABLED:
+                    profiling.count("drag.matches", len(matches_found))
+                if tally is None:
+                    matches.extend(matches_found)
+                else:
+                    for m in matches_found:
+                        tally.add(m)
+            if profiling.ENABLED:
+                profiling.add_time("drag.validate", time.perf_counter() - screened)
     print("Finished looking for potential matches!")
-    print(f"Found {len(matches)} potential matches!")
-    return matches
+    found = len(matches) if tally is None else tally.matches
+    print(f"Found {found} potential matches!")
+    if persist:
+        _report_and_save_cache()
+    return matches if tally is None else tally
+
+
+def _report_and_save_cache(part=False):
+    stats = command_cache_stats()
+    print(f"Trie query cache: {stats['hits']} hits, {stats['misses']} misses "
+          f"({stats['hit_rate']:.1%}), {stats['evictions']} evictions, "
+          f"{stats['entries']} entries")
+    save_command_cache(part)
+
+
+def crib_cost(masks, crib, len_ct, resolved=0):
+    """
+    Estimated work to drag `crib`: one mask AND per crib byte per table, plus a
+    dictionary validation for every window that survives the byte-class screen
+    (and isn't already `resolved`).
+    """
+    tables = sum(len(inner) for inner in masks)
+    windows = sum(alive.bit_count()
+                  for alive in plausible_offsets(masks, crib, len_ct, resolved))
+    return len(crib) * tables + VALIDATION_COST * windows
+
+
+# Per-worker state for `drag_batch`, installed once by `init_drag_worker` so each
+# task only has to ship its cribs.
+_worker = {}
+
+
+def init_drag_worker(matrix, len_ct, num_ct, dict, stream=False,
+                     masks=None, resolved=0):
+    """
+    Pool initializer for `drag_batch`: keep the shared inputs in the worker, and
+    report the query cache and write its new entries to a part file once when
+    the worker exits (the parent then calls `merge_command_cache`). With
+    stream=True each batch returns a VoteTally instead of its matches. `masks`
+    (e.g. `AdmissibleKeys.offset_masks`) saves each worker building its own.
+    `resolved` columns are skipped, as in `auto_crib_drag`.
+    """
+    if masks is None:
+        masks = byte_class_masks(matrix)
+    _worker.update(matrix=matrix, len_ct=len_ct, num_ct=num_ct, dict=dict,
+                   masks=masks, stream=stream, resolved=resolved)
+    Finalize(None, _report_and_save_cache, kwargs={"part": True},
+             exitpriority=10)
+
+
+def drag_batch(task):
+    """
+    Crib drag one (index, words) batch in a worker set up by `init_drag_worker`.
+
+    Returns (index, pid, number of cribs, seconds spent, matches, profile), so
+    the caller can restore batch order and report per-worker throughput. In
+    streaming mode `matches` is a VoteTally of the batch's matches. `profile` is
+    what the worker's instrumentation gathered for this batch (see
+    `profiling.snapshot`), or None when profiling is off.
+    """
+    index, words = task
+    start = time.perf_counter()
+    matches = auto_crib_drag(words, _worker["matrix"], _worker["len_ct"],
+                             _worker["num_ct"], _worker["dict"],
+                             masks=_worker["masks"], persist=False,
+                             tally=VoteTally() if _worker["stream"] else None,
+                             resolved=_worker["resolved"])
+    elapsed = time.perf_counter() - start
+    profile = None
+    if profiling.ENABLED:
+        profiling.add_time("drag.batch", elapsed)
+        profile = profiling.snapshot(reset=True)
+    return index, os.getpid(), len(words), elapsed, matches, profile
+
+
+def drag_window(words, ciphertexts, lo, hi, dict, allowed=PLAUSIBLE_BYTES,
+                seeded=False):
+    """
+    Crib drag the columns [lo, hi) of a ciphertext set on their own.
+
+    The messages are sliced there (one that is shorter, or has already ended,
+    just gives a shorter or empty slice) and dragged as a CiphertextSet, so the
+    screening tables and everything else are sized by the window rather than
+    by the messages. Returns a VoteTally of the matches found, at columns
+    relative to `lo`. With seeded=True, the columns `seed_keystream` resolves
+    in the slice are skipped (`expand.windowed_recover` seeds them the same).
+    """
+    cts = [ct[lo:hi] for ct in ciphertexts]
+    admissible = AdmissibleKeys.from_ciphertexts(cts, allowed)
+    masks = admissible.offset_masks(cts)
+    resolved = (resolved_columns(seed_keystream(cts, admissible))
+                if seeded else 0)
+    matrix = CiphertextSet(cts)
+    return auto_crib_drag(words, matrix, matrix.length, len(cts), dict,
+                          masks=masks, persist=False, tally=VoteTally(),
+                          resolved=resolved)
+
+
+def init_window_worker(ciphertexts, words, dict, seeded=False):
+    """
+    Pool initializer for `drag_window_task`: keep the ciphertexts, cribs and
+    dictionary in the worker, and write the query cache's new entries to a
+    part file when it exits, as `init_drag_worker` does.
+    """
+    _worker.update(ciphertexts=ciphertexts, words=words, dict=dict,
+                   seeded=seeded)
+    Finalize(None, _report_and_save_cache, kwargs={"part": True},
+             exitpriority=10)
+
+
+def drag_window_task(task):
+    """
+    Crib drag one (index, (lo, hi, start, stop)) window of `column_windows` in
+    a worker set up by `init_window_worker`.
+
+    Returns (index, pid, seconds spent, tally, profile), as `drag_batch` does.
+    """
+    index, (lo, hi, _, _) = task
+    start = time.perf_counter()
+    tally = drag_window(_worker["words"], _worker["ciphertexts"], lo, hi,
+                        _worker["dict"], seeded=_worker["seeded"])
+    elapsed = time.perf_counter() - start
+    profile = None
+    if profiling.ENABLED:
+        profiling.add_time("drag.window", elapsed)
+        profile = profiling.snapshot(reset=True)
+    return index, os.getpid(), elapsed, tally, profile
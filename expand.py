@@ -1,104 +1,251 @@
+import hashlib
+import os
 import string
+import sys
+import time
+from bisect import bisect_left
 from collections import defaultdict
+from itertools import accumulate
+from multiprocessing import Pool
+from multiprocessing.sharedctypes import RawArray
 
 from reconstruct import (collect_keystream_votes, recover_keystream,
-                         decrypt_with_keystream, find_conflicts)
+                         decrypt_with_keystream, find_conflicts, VoteTally,
+                         VoteMatrix, add_vote, vote_count, drop_vote,
+                         count_corroborated, AdmissibleKeys)
+from querycache import QueryCache
+from checkpoint import RecoveryCheckpoint, run_key
+from seeding import seed_keystream
+import profiling
 
 # Characters that may legitimately appear in a recovered plaintext.
 ALLOWED = set(string.ascii_letters + " " + "!,.:;'\"?")
 # Characters that make up a "word" (used to delimit fragments).
 WORDCHARS = set(string.ascii_letters + "'")
-# Tokens longer than this are left unvalidated (too sparse to constrain cheaply).
+# Tokens longer than this are left unvalidated (None validates every token).
+# Checking them is cheap (see `WordIndex._segmentable`), but a long run of cells
+# usually crosses some wrong byte from an earlier pass; rejecting every
+# candidate that touches it stalls recovery (122 -> 103 bytes on the sample).
 MAX_TOKEN = 30
 
 
+# Stands in for an unknown cell in the string keys of WordIndex's caches.
+WILDCARD = "\0"
+# Entries WordIndex's token cache may hold before the least recently used are
+# evicted (0 disables the bound).
+INDEX_CACHE_SIZE = int(os.environ.get("WORDINDEX_CACHE_SIZE", 1_000_000))
+
+
 class WordIndex:
     """
     Dictionary with length buckets and a lazy (length, position, char) index.
 
-    The position index turns "does any word match these fixed letters" and
-    "which words match" from a full bucket scan into a small set intersection,
-    which is the dominant cost during expansion. Everything is lowercase so it
-    is case-insensitive (capitalised words validate against lowercase entries).
+    Words are interned as integer IDs: all words of one length are stored,
+    sorted, in a single fixed-width string, and ID `i` is the slice
+    [i * length, (i + 1) * length]. Each (position, char) posting is a packed bit
+    array of IDs held in a Python int. That turns "does any word match these
+    fixed letters" into a few bitwise ANDs and a zero test, and "which words
+    match" into the same ANDs plus decoding the set bits -- the dominant cost
+    during expansion. Nothing stores a word string per posting, so the index
+    stays small enough to replicate across pool workers (see `memory_report`).
+    Everything is lowercase so it is case-insensitive (capitalised words
+    validate against lowercase entries).
+
+    Token answers are memoized in a bounded LRU cache (see `cache_stats`),
+    which can be saved after a run and loaded to start the next one warm
+    (`save_caches` / `load_caches`).
     """
 
-    def __init__(self, words):
-        self._set = set(words)
-        self.by_len = defaultdict(list)
-        for w in self._set:
-            self.by_len[len(w)].append(w)
-        self._pos = {}              # length -> {(pos, char): set(words)}, built lazily
-        self._wmatch_cache = {}
-        self._tokensat_cache = {}
+    __slots__ = ("_buckets", "_counts", "_pos", "_tokensat_cache",
+                 "_fingerprint")
+
+    def __init__(self, words, cache_size=INDEX_CACHE_SIZE):
+        by_len = defaultdict(set)
+        for w in words:
+            by_len[len(w)].add(w)
+        self._buckets = {}          # length -> sorted words, concatenated
+        self._counts = {}           # length -> number of words
+        for length, bucket in by_len.items():
+            self._add_bucket(length, bucket)
+        self._pos = {}              # length -> [{char: bitmap}] per position, lazy
+        self._tokensat_cache = QueryCache(cache_size or None)
+        self._fingerprint = None
+
+    def _add_bucket(self, length, words):
+        words = sorted(words)
+        self._buckets[length] = "".join(words)
+        self._counts[length] = len(words)
+        self._fingerprint = None
+
+    @classmethod
+    def from_dictionary(cls, compiled, sections=("words", "short"),
+                        cache_size=INDEX_CACHE_SIZE):
+        """
+        Build straight from a compiled dictionary's length buckets (see
+        `wordlist`), skipping the per-word bucketing pass. The default sections
+        hold the same words as `load_words` | `load_short_words`.
+        """
+        index = cls((), cache_size)
+        for section in sections:
+            for length in compiled.lengths(section):
+                bucket = compiled.bucket(section, length)
+                if length in index._buckets:
+                    bucket = set(bucket) | set(index._words(length))
+                index._add_bucket(length, bucket)
+        return index
+
+    def _words(self, length):
+        """Every length-`length` word, in ID order."""
+        bucket = self._buckets.get(length, "")
+        return [bucket[i:i + length] for i in range(0, len(bucket), length)]
 
     def is_word(self, w):
-        return w.lower() in self._set
+        w = w.lower()
+        length = len(w)
+        bucket = self._buckets.get(length)
+        if not bucket:
+            return False
+        i = bisect_left(range(self._counts[length]), w,
+                        key=lambda i: bucket[i * length:(i + 1) * length])
+        return bucket[i * length:(i + 1) * length] == w
 
     def _pos_index(self, length):
+        """Per position, char -> bitmap of the IDs with that char there."""
         idx = self._pos.get(length)
         if idx is None:
-            idx = defaultdict(set)
-            for w in self.by_len.get(length, ()):
-                for i, ch in enumerate(w):
-                    idx[(i, ch)].add(w)
+            bucket = self._buckets.get(length, "")
+            size = (self._counts.get(length, 0) + 7) // 8
+            idx = []
+            for p in range(length):
+                ids = defaultdict(list)
+                for i, ch in enumerate(bucket[p::length]):
+                    ids[ch].append(i)
+                postings = {}
+                for ch, members in ids.items():
+                    bits = bytearray(size)
+                    for i in members:
+                        bits[i >> 3] |= 1 << (i & 7)
+                    postings[ch] = int.from_bytes(bits, "little")
+                idx.append(postings)
             self._pos[length] = idx
         return idx
 
-    def words_matching(self, length, constraints):
-        """Set of length-`length` words satisfying every (pos, lowercase-char)."""
+    def build_postings(self):
+        """
+        Build every length's (position, char) index now instead of on first
+        use, e.g. so a benchmark times queries rather than the lazy build.
+        Returns the lengths indexed.
+        """
+        lengths = sorted(self._counts)
+        for length in lengths:
+            self._pos_index(length)
+        return lengths
+
+    def _match_bits(self, length, constraints):
+        """Bitmap of length-`length` word IDs satisfying every (pos, char)."""
         if not constraints:
-            return set(self.by_len.get(length, ()))
+            return (1 << self._counts.get(length, 0)) - 1
         idx = self._pos_index(length)
-        lists = []
+        bits = -1
         for pos, ch in constraints:
-            s = idx.get((pos, ch))
-            if not s:
-                return set()
-            lists.append(s)
-        lists.sort(key=len)
-        result = set(lists[0])
-        for s in lists[1:]:
-            result &= s
-            if not result:
+            bits &= idx[pos].get(ch, 0)
+            if not bits:
                 break
+        return bits
+
+    def _words_for(self, length, bits):
+        """Decode a bitmap of word IDs back into the set of words."""
+        bucket = self._buckets.get(length, "")
+        result = set()
+        while bits:
+            low = bits & -bits
+            i = low.bit_length() - 1
+            result.add(bucket[i * length:(i + 1) * length])
+            bits ^= low
         return result
 
+    def words_matching(self, length, constraints):
+        """Set of length-`length` words satisfying every (pos, lowercase-char)."""
+        if not constraints:
+            return set(self._words(length))
+        return self._words_for(length, self._match_bits(length, constraints))
+
     def candidates(self, length, constraints, max_err):
         """Words matching `constraints` with up to `max_err` (0 or 1) mismatches."""
-        result = self.words_matching(length, constraints)
-        if max_err >= 1 and constraints:
-            result = set(result)
+        if not constraints:
+            return set(self._words(length))
+        bits = self._match_bits(length, constraints)
+        if max_err >= 1:
+            # One mismatch allowed: OR together the matches with each single
+            # constraint dropped, then decode the union once.
             for j in range(len(constraints)):
-                result |= self.words_matching(length,
-                                              constraints[:j] + constraints[j + 1:])
-        return result
+                bits |= self._match_bits(length,
+                                         constraints[:j] + constraints[j + 1:])
+        return self._words_for(length, bits)
 
     def word_matches(self, pattern):
-        """True if some dict word of len(pattern) matches it (None = wildcard)."""
-        key = tuple(ch.lower() if ch is not None else None for ch in pattern)
-        cached = self._wmatch_cache.get(key)
-        if cached is not None:
-            return cached
-        constraints = [(i, ch) for i, ch in enumerate(key) if ch is not None]
-        length = len(key)
-        if not constraints:
-            result = bool(self.by_len.get(length))
-        else:
-            idx = self._pos_index(length)
-            lists = []
-            result = True
-            for pos, ch in constraints:
-                s = idx.get((pos, ch))
-                if not s:
-                    result = False
-                    break
-                lists.append(s)
-            if result and len(lists) > 1:
-                lists.sort(key=len)
-                # Probe the smallest posting list against the others (no copy).
-                result = any(all(w in s for s in lists[1:]) for w in lists[0])
-        self._wmatch_cache[key] = result
-        return result
+        """
+        True if some dict word of len(pattern) matches it (None = wildcard).
+        Not memoized: expansion no longer calls it (`token_satisfiable` checks
+        whole tokens), and uncached it is only a few ANDs.
+        """
+        constraints = [(i, ch.lower()) for i, ch in enumerate(pattern)
+                       if ch is not None]
+        return self._match_bits(len(pattern), constraints) != 0
+
+    def fingerprint(self):
+        """Digest of the indexed words; cache snapshots are only valid for it."""
+        if self._fingerprint is None:
+            digest = hashlib.sha256()
+            for length in sorted(self._buckets):
+                digest.update(f"{length}:".encode())
+                digest.update(self._buckets[length].encode("utf-8"))
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def _cache_paths(self, directory):
+        stem = os.path.join(directory, f"wordindex-{self.fingerprint()[:16]}")
+        return {"token": (self._tokensat_cache, stem + "-token.pkl")}
+
+    def cache_stats(self):
+        """Hit/miss/eviction counters and fill of each cache."""
+        return {"token": self._tokensat_cache.stats()}
+
+    def clear_caches(self):
+        """Empty the token cache (its counters are kept)."""
+        self._tokensat_cache.clear()
+
+    def load_caches(self, directory):
+        """
+        Pre-warm the caches from snapshots saved for this same word list.
+        Returns the number of entries read per cache.
+        """
+        return {name: cache.load(path)
+                for name, (cache, path) in self._cache_paths(directory).items()}
+
+    def save_caches(self, directory, lock=None):
+        """Merge the caches into their on-disk snapshots under `directory`."""
+        return {name: cache.save(path, lock=lock)
+                for name, (cache, path) in self._cache_paths(directory).items()}
+
+    def memory_report(self):
+        """
+        Approximate bytes held by each internal structure (containers plus the
+        objects they own), for sizing pool workers.
+        """
+        def sized(d):
+            return sys.getsizeof(d) + sum(
+                sys.getsizeof(k) + sys.getsizeof(v) for k, v in d.items())
+
+        report = {
+            "words": sized(self._buckets) + sys.getsizeof(self._counts),
+            "postings": sys.getsizeof(self._pos) + sum(
+                sys.getsizeof(idx) + sum(sized(p) for p in idx)
+                for idx in self._pos.values()),
+            "token_cache": self._tokensat_cache.nbytes(),
+        }
+        report["total"] = sum(report.values())
+        return report
 
     def token_satisfiable(self, cells):
         """
@@ -110,35 +257,66 @@ class WordIndex:
         one cell -- so 'af?ej' (no 5-letter word, and 'af'/'ej' aren't words) is
         correctly rejected. Case-insensitive.
         """
-        cells = tuple(c.lower() if c is not None else None for c in cells)
+        if MAX_TOKEN is not None and len(cells) > MAX_TOKEN:
+            return True  # see MAX_TOKEN
+        cells = "".join(c.lower() if c is not None else WILDCARD for c in cells)
         cached = self._tokensat_cache.get(cells)
         if cached is not None:
             return cached
+        result = self._segmentable(cells)
+        self._tokensat_cache.put(cells, result)
+        return result
+
+    def _segmentable(self, cells):
+        """
+        `token_satisfiable` for a token in cache-key form, in one left-to-right
+        pass over its cells.
+
+        The frontier holds every word still being read as (start, length, bits):
+        the bitmap of length-`length` words consistent with the cells since
+        `start`. A known cell ANDs in its posting and an unknown one leaves the
+        bitmap as it is, so long unknown runs cost nothing per cell. A word that
+        completes just before an unknown cell lets the next word start after
+        it, the unknown acting as a space.
+        """
         m = len(cells)
-        if m > MAX_TOKEN:
-            return True  # too long/sparse to constrain affordably
-        memo = {}
-
-        def segment(i):
-            if i == m:
-                return True
-            if i in memo:
-                return memo[i]
-            ok = False
-            for j in range(i + 1, m + 1):
-                if self.word_matches(cells[i:j]):
-                    if j == m:
-                        ok = True
-                        break
-                    if cells[j] is None and segment(j + 1):  # unknown acts as space
-                        ok = True
+        if not m:
+            return True
+        lengths = sorted(self._counts)
+        postings = {}
+        starts = {0}
+        last_start = 0
+        frontier = []
+        for c, ch in enumerate(cells):
+            if c in starts:
+                for length in lengths:
+                    end = c + length
+                    if end > m:
                         break
-            memo[i] = ok
-            return ok
-
-        result = segment(0)
-        self._tokensat_cache[cells] = result
-        return result
+                    # A word can only end at the token's end or before an unknown.
+                    if end == m or cells[end] == WILDCARD:
+                        frontier.append((c, length, -1))  # -1: every word so far
+            advanced = []
+            for start, length, bits in frontier:
+                if ch != WILDCARD:
+                    idx = postings.get(length)
+                    if idx is None:
+                        idx = postings[length] = self._pos_index(length)
+                    bits &= idx[c - start].get(ch, 0)
+                    if not bits:
+                        continue
+                if c - start + 1 < length:
+                    advanced.append((start, length, bits))
+                    continue
+                end = c + 1  # a word fills cells[start:end]
+                if end == m or end + 1 == m:  # (the last cell acting as space)
+                    return True
+                starts.add(end + 1)  # cells[end] is unknown: it acts as space
+                last_start = max(last_start, end + 1)
+            frontier = advanced
+            if not frontier and last_start <= c:
+                return False
+        return False
 
 
 def _decrypt_chars(ct, key, known):
@@ -182,14 +360,24 @@ def _token_bounds(chars, overrides, pos):
     return a, b
 
 
-def _cross_message_ok(proposal, plains, ciphertexts, source, index):
+def _cross_message_ok(proposal, plains, ciphertexts, source, index,
+                      admissible=None):
     """
     A proposed set of keystream bytes must keep *every other* message valid: each
     revealed character must be allowed, and every token the change touches must
     still be fillable into real dictionary words. Validating the whole token (not
     just the letters immediately around the change) is what rules out impossible
     options like 'af?ej'.
+
+    With an AdmissibleKeys table the per-character check is one lookup per
+    position, which also rejects key bytes that retraction has blocked.
     """
+    if profiling.ENABLED:
+        profiling.count("expand.cross_checks")
+    if admissible is not None and not admissible.allows_all(proposal):
+        if profiling.ENABLED:
+            profiling.count("expand.rejected_admissible")
+        return False
     for j, ct in enumerate(ciphertexts):
         if j == source:
             continue
@@ -284,7 +472,7 @@ def _candidate_forms(word, chars, word_start):
 
 
 def _delimited_candidates(chars, t_start, t_end, ct, index, plains,
-                          ciphertexts, source, max_err):
+                          ciphertexts, source, max_err, admissible=None):
     """Words that fit a fixed-length, space-delimited token (<= max_err fixes)."""
     pat = chars[t_start:t_end + 1]
     if any(c is not None and c not in WORDCHARS for c in pat):
@@ -302,13 +490,14 @@ def _delimited_candidates(chars, t_start, t_end, ct, index, plains,
     for w in index.candidates(len(pat), constraints, budget):
         for cand in _candidate_forms(w, chars, t_start):
             prop = _proposal_for_word(chars, ct, cand, t_start)
-            if prop and _cross_message_ok(prop, plains, ciphertexts, source, index):
+            if prop and _cross_message_ok(prop, plains, ciphertexts, source,
+                                          index, admissible):
                 survivors.append({"word": cand, "start": t_start, "proposal": prop})
     return survivors
 
 
 def _open_candidates(chars, start, end, ct, index, plains, ciphertexts, source,
-                     forward):
+                     forward, admissible=None):
     """Words that extend a one-side-anchored fragment via prefix/suffix match."""
     frag = chars[start:end + 1]
     if any(c is None or c not in WORDCHARS for c in frag):
@@ -341,13 +530,14 @@ def _open_candidates(chars, start, end, ct, index, plains, ciphertexts, source,
         for w in index.candidates(length, constraints, budget):
             for cand in _candidate_forms(w, chars, word_start):
                 prop = _proposal_for_word(chars, ct, cand, word_start)
-                if prop and _cross_message_ok(prop, plains, ciphertexts, source, index):
+                if prop and _cross_message_ok(prop, plains, ciphertexts, source,
+                                              index, admissible):
                     survivors.append({"word": cand, "start": word_start, "proposal": prop})
     return survivors
 
 
 def _floating_candidates(chars, start, end, ct, index, plains, ciphertexts,
-                         source):
+                         source, admissible=None):
     """Words that *contain* a fragment bounded by unknowns on both sides."""
     frag = chars[start:end + 1]
     if any(c is None or c not in WORDCHARS for c in frag):
@@ -388,7 +578,8 @@ def _floating_candidates(chars, start, end, ct, index, plains, ciphertexts,
             for w in index.candidates(length, constraints, budget):
                 for cand in _candidate_forms(w, chars, word_start):
                     prop = _proposal_for_word(chars, ct, cand, word_start)
-                    if prop and _cross_message_ok(prop, plains, ciphertexts, source, index):
+                    if prop and _cross_message_ok(prop, plains, ciphertexts,
+                                                  source, index, admissible):
                         survivors.append({"word": cand, "start": word_start, "proposal": prop})
     return survivors
 
@@ -415,40 +606,249 @@ def _fragments(chars):
         p += 1
 
 
-def _each_spot(plains, ciphertexts, index, max_err):
+def _spot_kinds(chars):
+    """
+    (kind, start, end) for every token/fragment of one message, in solving
+    order: space-delimited tokens first, then fragments, whose kind says which
+    side (if any) is anchored.
+    """
+    for t_start, t_end in _closed_tokens(chars):
+        yield "token", t_start, t_end
+    for start, end in _fragments(chars):
+        lc = chars[start - 1] if start > 0 else None
+        rc = chars[end + 1] if end < len(chars) - 1 else None
+        left = start == 0 or (lc is not None and lc not in WORDCHARS)
+        right = end == len(chars) - 1 or (rc is not None and rc not in WORDCHARS)
+        if left and not right:
+            yield "forward", start, end
+        elif right and not left:
+            yield "backward", start, end
+        elif not left and not right:
+            yield "floating", start, end
+
+
+def _solve_spot(kind, start, end, source, plains, ciphertexts, index, max_err,
+                admissible=None):
+    """Surviving candidate records for one spot (see `_spot_kinds`)."""
+    if profiling.ENABLED:
+        checks, began = profiling.counter("expand.cross_checks"), time.perf_counter()
+    chars, ct = plains[source], ciphertexts[source]
+    if kind == "token":
+        surv = _delimited_candidates(chars, start, end, ct, index, plains,
+                                     ciphertexts, source, max_err, admissible)
+    elif kind == "floating":
+        surv = _floating_candidates(chars, start, end, ct, index, plains,
+                                    ciphertexts, source, admissible)
+    else:
+        surv = _open_candidates(chars, start, end, ct, index, plains,
+                                ciphertexts, source, kind == "forward",
+                                admissible)
+    if profiling.ENABLED:
+        # Every candidate placement is cross-checked once, so the checks made
+        # while solving are the candidates generated; those not surviving
+        # were rejected.
+        checked = profiling.counter("expand.cross_checks") - checks
+        profiling.add_time(f"expand.solve.{kind}", time.perf_counter() - began)
+        profiling.count(f"expand.{kind}.candidates", checked)
+        profiling.count(f"expand.{kind}.rejected", checked - len(surv))
+    return surv
+
+
+def _each_spot(plains, ciphertexts, index, max_err, admissible=None):
     """
     Yield (source, start, end, survivors) for every token/fragment that has at
     least one surviving candidate, across all messages. Shared by the automatic
     loop (which commits agreement) and the interactive loop (which presents
     disagreement).
     """
-    for source, ct in enumerate(ciphertexts):
-        chars = plains[source]
-        for t_start, t_end in _closed_tokens(chars):
-            surv = _delimited_candidates(chars, t_start, t_end, ct, index,
-                                         plains, ciphertexts, source, max_err)
-            if surv:
-                yield source, t_start, t_end, surv
-        for start, end in _fragments(chars):
-            lc = chars[start - 1] if start > 0 else None
-            rc = chars[end + 1] if end < len(chars) - 1 else None
-            left = start == 0 or (lc is not None and lc not in WORDCHARS)
-            right = end == len(chars) - 1 or (rc is not None and rc not in WORDCHARS)
-            if left and not right:
-                surv = _open_candidates(chars, start, end, ct, index, plains,
-                                        ciphertexts, source, True)
-            elif right and not left:
-                surv = _open_candidates(chars, start, end, ct, index, plains,
-                                        ciphertexts, source, False)
-            elif not left and not right:
-                surv = _floating_candidates(chars, start, end, ct, index,
-                                            plains, ciphertexts, source)
-            else:
-                surv = []
+    for source in range(len(ciphertexts)):
+        for kind, start, end in _spot_kinds(plains[source]):
+            surv = _solve_spot(kind, start, end, source, plains, ciphertexts,
+                               index, max_err, admissible)
             if surv:
                 yield source, start, end, surv
 
 
+def _spot_reach(kind, start, end, source, plains):
+    """
+    Columns [lo, hi] that solving a spot can read, in any message.
+
+    That is the widest span a candidate word can occupy (fragments grow into
+    the unknowns beside them), plus the capitalisation context before it and
+    the boundary after it -- widened, in every message, to the edge of the
+    token the candidate could touch there (what `_cross_message_ok` checks).
+    If no keystream column in this range changes, the spot's survivors can't.
+    """
+    chars = plains[source]
+    lo, hi = start, end
+    if kind == "forward":
+        while hi + 1 < len(chars) and chars[hi + 1] is None:
+            hi += 1
+    elif kind == "backward":
+        while lo - 1 >= 0 and chars[lo - 1] is None:
+            lo -= 1
+    elif kind == "floating":
+        lo, hi = start - 6, end + 6  # gaps are scanned at most 6 deep
+    lo, hi = max(lo - 3, 0), hi + 2  # capital context, boundary, gap stop
+    reach_lo, reach_hi = lo, hi
+    for other in plains:
+        a = min(lo, len(other))
+        while a > 0 and (other[a - 1] is None or other[a - 1] in WORDCHARS):
+            a -= 1
+        b = hi
+        while b + 1 < len(other) and (other[b + 1] is None
+                                      or other[b + 1] in WORDCHARS):
+            b += 1
+        reach_lo, reach_hi = min(reach_lo, a - 1), max(reach_hi, b + 1)
+    return max(reach_lo, 0), reach_hi
+
+
+def _changed_columns(prev, key, known):
+    """Columns whose keystream byte (or whether it is known) differs from prev."""
+    prev_key, prev_known = prev
+    return [p for p in range(len(known))
+            if known[p] != prev_known[p] or (known[p] and key[p] != prev_key[p])]
+
+
+# Per-worker state for `solve_spots`, installed once by `init_expand_worker`.
+# The word index and ciphertexts arrive with the initializer; the working
+# keystream lives in shared arrays the parent rewrites before every pass, so a
+# task is just the spots to solve (plus the pass it belongs to).
+_worker = {}
+
+
+def init_expand_worker(index, ciphertexts, max_err, key_buf, known_buf,
+                       admissible=None):
+    """Pool initializer for parallel expansion passes."""
+    _worker.update(index=index, ciphertexts=ciphertexts, max_err=max_err,
+                   key_buf=key_buf, known_buf=known_buf, admissible=admissible,
+                   generation=None)
+
+
+def solve_spots(task):
+    """
+    Solve a chunk of (source, kind, start, end) spots in a worker set up by
+    `init_expand_worker`, against the working keystream of pass `generation`.
+    Returns the survivors for each spot, in order, and the instrumentation
+    gathered meanwhile (None when profiling is off).
+    """
+    generation, spots = task
+    w = _worker
+    if w["generation"] != generation:
+        key, known = bytes(w["key_buf"]), bytes(w["known_buf"])
+        w["plains"] = [_decrypt_chars(ct, key, known) for ct in w["ciphertexts"]]
+        w["generation"] = generation
+    solved = [_solve_spot(kind, start, end, source, w["plains"],
+                          w["ciphertexts"], w["index"], w["max_err"],
+                          w["admissible"])
+              for source, kind, start, end in spots]
+    return solved, profiling.snapshot(reset=True) if profiling.ENABLED else None
+
+
+class ExpandPool:
+    """
+    Worker processes that solve expansion spots in parallel.
+
+    Each worker receives the (read-only) WordIndex and ciphertexts once; per
+    pass only the keystream is published, through shared memory. An
+    AdmissibleKeys table must be in shared memory too (see
+    `AdmissibleKeys.shared`), so bytes blocked later reach the workers. Results come
+    back in submission order, so committing them is identical to solving the
+    same spots serially.
+    """
+
+    # Below this many spots a pass is solved in-process: shipping the work out
+    # costs more than it saves.
+    MIN_SPOTS = 32
+
+    def __init__(self, processes, index, ciphertexts, max_err, admissible=None):
+        length = max((len(ct) for ct in ciphertexts), default=0)
+        self.processes = processes
+        self._key = RawArray('B', length)
+        self._known = RawArray('B', length)
+        self._generation = 0
+        self._pool = Pool(processes, initializer=init_expand_worker,
+                          initargs=(index, ciphertexts, max_err, self._key,
+                                    self._known, admissible))
+
+    def solve(self, spots, key, known):
+        """Survivors for each of `spots` under the working keystream, in order."""
+        self._generation += 1
+        self._key[:] = bytes(key)
+        self._known[:] = bytes(known)
+        chunk = -(-len(spots) // (self.processes * 4))
+        chunks = [spots[i:i + chunk] for i in range(0, len(spots), chunk)]
+        with profiling.timer("expand.pool_solve"):
+            results = self._pool.map(solve_spots,
+                                     [(self._generation, c) for c in chunks])
+        solved = []
+        for part, profile in results:
+            solved.extend(part)
+            profiling.merge(profile)
+        return solved
+
+    def close(self):
+        self._pool.close()
+        self._pool.join()
+
+
+def _each_spot_incremental(plains, ciphertexts, index, max_err, cache, changed,
+                           pool=None, view=None, admissible=None):
+    """
+    `_each_spot`, reusing the survivors cached for any spot whose reach holds
+    no changed column; only spots touching a change are solved again.
+
+    `cache` maps (source, kind, start, end) -> (lo, hi, survivors) from the
+    previous pass and is replaced by this pass's entries. `changed` lists the
+    columns that changed since then (None: treat everything as changed).
+
+    With an ExpandPool as `pool` (and the working (key, known) as `view`), the
+    spots to re-solve are farmed out to it; results are still yielded in the
+    serial order.
+    """
+    length = max((len(p) for p in plains), default=0)
+    if changed is not None:
+        # dirty[i] = number of changed columns before i, for O(1) range checks.
+        marks = [0] * (length + 1)
+        for p in changed:
+            marks[p + 1] = 1
+        dirty = list(accumulate(marks))
+    fresh = {}
+    stale = []
+    for source in range(len(ciphertexts)):
+        for kind, start, end in _spot_kinds(plains[source]):
+            key = (source, kind, start, end)
+            entry = cache.get(key)
+            if entry is not None and changed is not None:
+                lo, hi = entry[0], min(entry[1], length - 1)
+                if dirty[hi + 1] - dirty[lo] > 0:
+                    entry = None
+            else:
+                entry = None
+            fresh[key] = entry
+            if entry is None:
+                stale.append(key)
+
+    if profiling.ENABLED:
+        profiling.count("expand.spots_solved", len(stale))
+        profiling.count("expand.spots_reused", len(fresh) - len(stale))
+    if pool is not None and len(stale) >= pool.MIN_SPOTS:
+        solved = pool.solve(stale, *view)
+    else:
+        solved = [_solve_spot(kind, start, end, source, plains, ciphertexts,
+                              index, max_err, admissible)
+                  for source, kind, start, end in stale]
+    for key, surv in zip(stale, solved):
+        source, kind, start, end = key
+        fresh[key] = _spot_reach(kind, start, end, source, plains) + (surv,)
+
+    cache.clear()
+    cache.update(fresh)
+    for (source, _, start, end), (_, _, surv) in fresh.items():
+        if surv:
+            yield source, start, end, surv
+
+
 def _commit(proposals, votes, committed, blocked, fill_w, corr_w):
     """
     Commit the keystream bytes that *all* candidate proposals agree on.
@@ -474,7 +874,7 @@ def _commit(proposals, votes, committed, blocked, fill_w, corr_w):
         if key_byte in blocked.get(pos, ()):
             continue  # this value was retracted as contradictory
         is_corr = any(p[pos][1] for p in proposals)
-        votes[pos][key_byte] += corr_w if is_corr else fill_w
+        add_vote(votes, pos, key_byte, corr_w if is_corr else fill_w)
         if (pos, key_byte) not in committed:
             committed.add((pos, key_byte))
             added += 1
@@ -482,23 +882,61 @@ def _commit(proposals, votes, committed, blocked, fill_w, corr_w):
 
 
 def _auto_passes(votes, ciphertexts, index, length, committed, blocked,
-                 min_votes, fill_w, corr_w, max_err, max_passes, log):
-    """Run the automatic complete/correct passes until nothing new is committed."""
-    for npass in range(1, max_passes + 1):
+                 min_votes, fill_w, corr_w, max_err, max_passes, log,
+                 pool=None, admissible=None, first_pass=1, on_pass=None):
+    """
+    Run the automatic complete/correct passes until nothing new is committed.
+
+    Passes are incremental: only keystream columns that changed since the last
+    pass are re-decrypted, and only spots whose reach touches one of them are
+    solved again (see `_each_spot_incremental`). Every spot's survivors are
+    still committed each pass, in the same order, so the votes come out exactly
+    as if everything had been re-solved. An ExpandPool, if given, solves the
+    changed spots in parallel.
+
+    `first_pass` continues a run interrupted after pass first_pass - 1 (see
+    `iterative_recover`'s checkpoints); `on_pass(npass, settled)` is called
+    after every pass.
+    """
+    cache = {}
+    prev = plains = None
+    for npass in range(first_pass, max_passes + 1):
+        began = time.perf_counter()
         # Read the working view at the same confidence threshold we commit at.
         # Reading at a *lower* threshold lets a weak single-vote byte form a
         # spurious complete word (e.g. 'fade'), which then blocks extending the
         # real fragment ('de' -> 'made') -- and the weak byte is dropped from the
         # final output anyway, leaving the fragment stuck.
         key, known, _ = recover_keystream(votes, length, min_votes)
-        plains = [_decrypt_chars(ct, key, known) for ct in ciphertexts]
+        if prev is None:
+            changed = None
+            plains = [_decrypt_chars(ct, key, known) for ct in ciphertexts]
+        else:
+            changed = _changed_columns(prev, key, known)
+            for ct, chars in zip(ciphertexts, plains):
+                for pos in changed:
+                    if pos < len(ct):
+                        byte = ct[pos] ^ key[pos]
+                        chars[pos] = (chr(byte) if known[pos] and 32 <= byte < 127
+                                      else None)
+        prev = (key, known)
         added = 0
-        for _, _, _, surv in _each_spot(plains, ciphertexts, index, max_err):
+        for _, _, _, surv in _each_spot_incremental(plains, ciphertexts, index,
+                                                    max_err, cache, changed,
+                                                    pool, (key, known),
+                                                    admissible):
             added += _commit([r["proposal"] for r in surv], votes, committed,
                              blocked, fill_w, corr_w)
         recovered = sum(recover_keystream(votes, length, min_votes)[1])
+        took = ""
+        if profiling.ENABLED:
+            elapsed = time.perf_counter() - began
+            profiling.record("expand.pass", elapsed)
+            took = f" ({elapsed:.3f}s)"
         log(f"  pass {npass}: +{added} new bytes, "
-            f"{recovered}/{length} keystream bytes recovered")
+            f"{recovered}/{length} keystream bytes recovered{took}")
+        if on_pass is not None:
+            on_pass(npass, added == 0)
         if added == 0:
             break
 
@@ -515,7 +953,8 @@ def _disagreed_positions(survivors):
     return frozenset(pos for pos, bs in pos_bytes.items() if len(bs) > 1)
 
 
-def gather_decisions(plains, ciphertexts, index, max_err, max_options):
+def gather_decisions(plains, ciphertexts, index, max_err, max_options,
+                     admissible=None):
     """
     Collect the ambiguous spots: tokens/fragments where several words survive
     cross-message validation but disagree on the keystream. Each decision lists
@@ -523,7 +962,8 @@ def gather_decisions(plains, ciphertexts, index, max_err, max_options):
     """
     decisions = []
     seen = set()
-    for source, start, end, surv in _each_spot(plains, ciphertexts, index, max_err):
+    for source, start, end, surv in _each_spot(plains, ciphertexts, index,
+                                               max_err, admissible):
         disagreed = _disagreed_positions(surv)
         if not disagreed:
             continue  # candidates agree -> the automatic loop handles it
@@ -544,12 +984,17 @@ def gather_decisions(plains, ciphertexts, index, max_err, max_options):
 
 
 def _render_window(plains, ciphertexts, proposal, lo, hi):
-    """Render every message over [lo, hi] with a candidate's keystream applied."""
+    """
+    Render every message over [lo, hi] with a candidate's keystream applied.
+    Columns past the end of a shorter message are left blank.
+    """
     rendered = []
     for j, ct in enumerate(ciphertexts):
         chars = []
         for p in range(lo, hi + 1):
-            if p in proposal:
+            if p >= len(ct):
+                chars.append(" ")
+            elif p in proposal:
                 byte = ct[p] ^ proposal[p][0]
                 chars.append(chr(byte) if 32 <= byte < 127 else "?")
             elif plains[j][p] is not None:
@@ -568,7 +1013,7 @@ def _present_and_choose(decision, plains, ciphertexts, remaining, prompt=input):
     """
     source, start, end = decision["source"], decision["start"], decision["end"]
     lo = max(0, start - 12)
-    hi = min(len(plains[0]) - 1, end + 12)
+    hi = min(max(len(plain) for plain in plains) - 1, end + 12)
     print()
     print(f"[{remaining} ambiguous spot(s) left] Message P{source + 1}, "
           f"columns {start}-{end} could be several words:")
@@ -596,23 +1041,28 @@ def _present_and_choose(decision, plains, ciphertexts, remaining, prompt=input):
 def _force(votes, committed, record, weight):
     """Force-commit the chosen candidate's keystream bytes so they win the vote."""
     for pos, (byte, _) in record["proposal"].items():
-        votes[pos][byte] += weight
+        add_vote(votes, pos, byte, weight)
         committed.add((pos, byte))
 
 
 def _interactive_loop(votes, ciphertexts, index, length, committed, blocked,
                       min_votes, fill_w, corr_w, max_err, max_passes,
-                      max_options, log, prompt=input):
+                      max_options, log, prompt=input, admissible=None,
+                      skipped=None, on_progress=None):
     """
     Present ambiguous words one at a time. After each choice, re-run the
     automatic passes so the decision can cascade, then look for what's left.
+
+    `skipped` holds the ambiguities already skipped (kept across a resume);
+    `on_progress(**progress)` is called after every skip, choice and pass.
     """
-    skipped = set()
+    skipped = set() if skipped is None else skipped
     while True:
         key, known, _ = recover_keystream(votes, length, min_votes)
         plains = [_decrypt_chars(ct, key, known) for ct in ciphertexts]
         decisions = [d for d in gather_decisions(plains, ciphertexts, index,
-                                                 max_err, max_options)
+                                                 max_err, max_options,
+                                                 admissible)
                      if d["key"] not in skipped]
         if not decisions:
             print("No more ambiguous words to resolve.")
@@ -624,14 +1074,19 @@ def _interactive_loop(votes, ciphertexts, index, length, committed, blocked,
             break
         if action == "skip":
             skipped.add(decision["key"])
+            if on_progress is not None:
+                on_progress()
             continue
         _force(votes, committed, decision["options"][action], corr_w)
+        if on_progress is not None:
+            on_progress(passes=0, settled=False)
         _auto_passes(votes, ciphertexts, index, length, committed, blocked,
                      min_votes, fill_w, corr_w, max_err, max_passes,
-                     lambda *a: None)
+                     lambda *a: None, admissible=admissible,
+                     on_pass=_pass_progress(on_progress))
 
 
-def _dead_end_tokens(plains, ciphertexts, index, max_err):
+def _dead_end_tokens(plains, ciphertexts, index, max_err, admissible=None):
     """
     Bounded tokens whose known letters admit no cross-message-valid word.
 
@@ -655,13 +1110,13 @@ def _dead_end_tokens(plains, ciphertexts, index, max_err):
             if unknowns == 0 and index.is_word("".join(cells)):
                 continue  # already a valid word
             if _delimited_candidates(chars, a, b, ct, index, plains,
-                                     ciphertexts, src, max_err):
+                                     ciphertexts, src, max_err, admissible):
                 continue  # a valid word can still fill/correct it
             deads.append((src, a, b))
     return deads
 
 
-def _retract_weakest(votes, key, known, a, b, blocked):
+def _retract_weakest(votes, key, known, a, b, blocked, admissible=None):
     """
     Drop the least-supported keystream byte among columns [a, b] and block it, so
     re-convergence must try a different value (which also re-decrypts the shared
@@ -670,42 +1125,63 @@ def _retract_weakest(votes, key, known, a, b, blocked):
     cols = [p for p in range(a, b + 1) if p < len(known) and known[p]]
     if not cols:
         return None
-    pos = min(cols, key=lambda p: votes[p].get(key[p], 0))
+    pos = min(cols, key=lambda p: vote_count(votes, p, key[p]))
     blocked.setdefault(pos, set()).add(key[pos])
-    votes[pos].pop(key[pos], None)
-    if not votes[pos]:
-        del votes[pos]  # don't leave an empty Counter behind
+    if admissible is not None:
+        admissible.block(pos, key[pos])
+    drop_vote(votes, pos, key[pos])
     return pos
 
 
 def _retract_passes(votes, ciphertexts, index, length, committed, blocked,
-                    min_votes, fill_w, corr_w, max_err, max_passes, rounds, log):
+                    min_votes, fill_w, corr_w, max_err, max_passes, rounds, log,
+                    pool=None, admissible=None, first_round=0, on_progress=None):
     """
     Alternate convergence with retraction: find contradictory tokens, remove
     their weakest byte, and re-converge -- letting a different (valid) word win.
+
+    `first_round` skips rounds already completed before a resume;
+    `on_progress(**progress)` is called after every retraction and pass.
     """
-    for r in range(rounds):
+    for r in range(first_round, rounds):
+        began = time.perf_counter()
         key, known, _ = recover_keystream(votes, length, min_votes)
         plains = [_decrypt_chars(ct, key, known) for ct in ciphertexts]
-        deads = _dead_end_tokens(plains, ciphertexts, index, max_err)
+        deads = _dead_end_tokens(plains, ciphertexts, index, max_err,
+                                 admissible)
         if not deads:
             break
         dropped = 0
         for src, a, b in deads:
-            if _retract_weakest(votes, key, known, a, b, blocked) is not None:
+            if _retract_weakest(votes, key, known, a, b, blocked,
+                                admissible) is not None:
                 dropped += 1
         log(f"  retract round {r + 1}: {len(deads)} dead-end token(s), "
             f"dropped {dropped} byte(s)")
         if not dropped:
             break
+        if on_progress is not None:
+            on_progress(round=r + 1, passes=0, settled=False)
         _auto_passes(votes, ciphertexts, index, length, committed, blocked,
-                     min_votes, fill_w, corr_w, max_err, max_passes, log)
+                     min_votes, fill_w, corr_w, max_err, max_passes, log, pool,
+                     admissible, on_pass=_pass_progress(on_progress))
+        if profiling.ENABLED:
+            profiling.record("expand.retract_round", time.perf_counter() - began)
+
+
+def _pass_progress(on_progress):
+    """An `_auto_passes` on_pass callback reporting to `on_progress`."""
+    if on_progress is None:
+        return None
+    return lambda npass, settled: on_progress(passes=npass, settled=settled)
 
 
 def iterative_recover(matches, ciphertexts, words, min_votes=2, max_passes=40,
                       fill_weight=4, corr_weight=1000, max_err=1, max_options=8,
                       retract_rounds=8, interactive=False, log=print,
-                      prompt=input):
+                      prompt=input, dense=False, processes=None,
+                      admissible=None, checkpoint_dir=None,
+                      checkpoint_key=None, seed=None):
     """
     Reconstruct, then repeatedly complete and correct words until convergence.
 
@@ -721,31 +1197,195 @@ def iterative_recover(matches, ciphertexts, words, min_votes=2, max_passes=40,
     With interactive=True, once that settles, any remaining spot where several
     words are *all* cross-message valid is presented for the user to choose; each
     choice re-triggers the automatic cascade.
+
+    `words` is either a collection of dictionary words or a prebuilt WordIndex.
+    `matches` is either a list of crib-drag matches or a VoteTally of them.
+    A `seed` of statistically guessed key bytes (see `seeding.seed_keystream`)
+    votes alongside them.
+    With dense=True the votes are held in a VoteMatrix, whose per-position
+    winners and totals are maintained in place as bytes are committed, forced
+    and retracted.
+
+    With processes > 1 the automatic passes solve their spots across that many
+    worker processes (see ExpandPool); the result is the same as the serial run.
+
+    `admissible` is the AdmissibleKeys table for `ciphertexts` (built here if
+    not given). Candidates are screened against it, and retraction blocks bytes
+    in it -- with processes > 1 too, where the workers use a shared-memory copy
+    that is copied back once they are done; pass a copy to keep the caller's
+    table unchanged.
+
+    With a `checkpoint_dir`, progress is saved there after every pass,
+    retraction round and interactive choice, under a key made from the
+    ciphertexts, the dictionary and the parameters above, plus the
+    `checkpoint_key` dict of whatever else shaped `matches` (the crib-drag
+    settings). If that directory already holds a checkpoint for the same key,
+    the run resumes from it and `matches` is not used -- it may be a callable
+    returning the matches, so that the crib drag is only run when there is
+    nothing to resume. The checkpoint is deleted once the run finishes.
+
+    The result also carries the final `votes`, as `windowed_recover` uses.
     """
     length = max((len(ct) for ct in ciphertexts), default=0)
-    index = WordIndex(words)
-    votes = collect_keystream_votes(matches, ciphertexts)
-    committed = set()
-    blocked = {}
-
-    _auto_passes(votes, ciphertexts, index, length, committed, blocked,
-                 min_votes, fill_weight, corr_weight, max_err, max_passes, log)
-    _retract_passes(votes, ciphertexts, index, length, committed, blocked,
-                    min_votes, fill_weight, corr_weight, max_err, max_passes,
-                    retract_rounds, log)
+    index = words if isinstance(words, WordIndex) else WordIndex(words)
+    if admissible is None:
+        admissible = AdmissibleKeys.from_ciphertexts(
+            ciphertexts, [ord(c) for c in ALLOWED])
+
+    checkpoint = state = None
+    if checkpoint_dir:
+        checkpoint = RecoveryCheckpoint(checkpoint_dir, run_key(
+            ciphertexts, words=index.fingerprint(), min_votes=min_votes,
+            max_passes=max_passes, fill_weight=fill_weight,
+            corr_weight=corr_weight, max_err=max_err, max_options=max_options,
+            retract_rounds=retract_rounds, dense=dense,
+            seed=sorted(seed.items()) if seed else None,
+            drag=sorted((checkpoint_key or {}).items())))
+        state = checkpoint.load()
+    if state is not None:
+        votes, committed, blocked = (state["votes"], state["committed"],
+                                     state["blocked"])
+        skipped, progress = state["skipped"], state["progress"]
+        for pos, bytes_here in blocked.items():
+            for key_byte in bytes_here:
+                admissible.block(pos, key_byte)
+        log(f"Resuming from {checkpoint.path} ({progress['phase']} phase, "
+            f"round {progress['round']}, pass {progress['passes']}); "
+            f"delete it to start over.")
+    else:
+        if callable(matches):
+            matches = matches()
+        if isinstance(matches, VoteTally):
+            votes = matches.votes(ciphertexts, seed)
+        else:
+            votes = collect_keystream_votes(matches, ciphertexts, seed)
+        if dense:
+            votes = VoteMatrix.from_votes(votes, length)
+        committed = set()
+        blocked = {}
+        skipped = set()
+        # phase: "auto" -> "retract" -> "interactive"; round: retraction rounds
+        # begun; passes: auto passes completed since the last phase/round/choice
+        # started; settled: whether those passes converged.
+        progress = {"phase": "auto", "round": 0, "passes": 0, "settled": False}
+
+    def on_progress(**changes):
+        progress.update(changes)
+        if checkpoint is not None:
+            checkpoint.save({"votes": votes, "committed": committed,
+                             "blocked": blocked, "skipped": skipped,
+                             "progress": progress})
+
+    def settle(pool=None, log=log):
+        """Finish the auto passes in flight when the checkpoint was taken."""
+        if not progress["settled"]:
+            _auto_passes(votes, ciphertexts, index, length, committed, blocked,
+                         min_votes, fill_weight, corr_weight, max_err,
+                         max_passes, log, pool, admissible,
+                         first_pass=progress["passes"] + 1,
+                         on_pass=_pass_progress(on_progress))
+
+    pool = None
+    caller_admissible = admissible
+    if (processes is not None and processes > 1
+            and progress["phase"] != "interactive"):
+        # The workers read the table from shared memory; what retraction
+        # blocks there is copied back into the caller's table below.
+        admissible = admissible.shared()
+        pool = ExpandPool(processes, index, ciphertexts, max_err, admissible)
+    try:
+        if progress["phase"] == "auto":
+            settle(pool)
+            on_progress(phase="retract", round=0, passes=0, settled=True)
+        if progress["phase"] == "retract":
+            settle(pool)
+            _retract_passes(votes, ciphertexts, index, length, committed,
+                            blocked, min_votes, fill_weight, corr_weight,
+                            max_err, max_passes, retract_rounds, log, pool,
+                            admissible, first_round=progress["round"],
+                            on_progress=on_progress)
+            on_progress(phase="interactive", passes=0, settled=True)
+    finally:
+        if pool is not None:
+            pool.close()
+            caller_admissible.bits[:] = bytes(admissible.bits)
+            admissible = caller_admissible
     if interactive:
+        settle(log=lambda *a: None)
         _interactive_loop(votes, ciphertexts, index, length, committed, blocked,
                           min_votes, fill_weight, corr_weight, max_err,
-                          max_passes, max_options, log, prompt=prompt)
+                          max_passes, max_options, log, prompt=prompt,
+                          admissible=admissible, skipped=skipped,
+                          on_progress=on_progress)
+    if checkpoint is not None:
+        checkpoint.discard()  # finished: a rerun starts from scratch
+
+    if profiling.ENABLED:
+        log("Expansion profile:")
+        for line in profiling.report(("expand.",)):
+            log(line)
 
     key, known, confidence = recover_keystream(votes, length, min_votes)
     plaintexts = decrypt_with_keystream(ciphertexts, key, known)
     conflicts = find_conflicts(votes)
     recovered = sum(known)
-    corroborated = sum(1 for pos, c in votes.items()
-                       if pos < length and c and c.most_common(1)[0][1] >= 2)
+    corroborated = count_corroborated(votes, length)
     return {
         "key": key, "known": known, "confidence": confidence,
         "plaintexts": plaintexts, "conflicts": conflicts, "length": length,
-        "recovered": recovered, "corroborated": corroborated,
+        "recovered": recovered, "corroborated": corroborated, "votes": votes,
+    }
+
+
+def windowed_recover(windows, tallies, ciphertexts, words, log=print,
+                     seeded=False, **kwargs):
+    """
+    `iterative_recover` one column window at a time, for messages too long to
+    hold every per-position table (votes, admissible keys, spot caches) for at
+    once.
+
+    `windows` come from `utils.column_windows` and `tallies` yields, in the
+    same order, the matches (or VoteTally) of each window's columns [lo, hi),
+    relative to `lo` -- e.g. from `decrypt.drag_window`, possibly computed
+    lazily or in a Pool. Each window is recovered from its own slice of the
+    ciphertexts, and only its own columns [start, stop) are kept: with an
+    overlap at least as long as the longest crib or token, everything that
+    decides those columns lies inside the slice. Apart from the result itself,
+    memory stays bounded by the window size. With seeded=True each slice's
+    votes are seeded by `seed_keystream`, as `decrypt.drag_window` expects.
+
+    Other keyword arguments go to `iterative_recover`. Returns its result
+    dict, for the whole length, without "votes".
+    """
+    length = max((len(ct) for ct in ciphertexts), default=0)
+    index = words if isinstance(words, WordIndex) else WordIndex(words)
+    key = bytearray(length)
+    known = [False] * length
+    confidence = [0.0] * length
+    conflicts = []
+    corroborated = 0
+    for (lo, hi, start, stop), tally in zip(windows, tallies):
+        began = time.perf_counter()
+        cts = [ct[lo:hi] for ct in ciphertexts]
+        part = iterative_recover(tally, cts, index, log=lambda *a: None,
+                                 seed=seed_keystream(cts) if seeded else None,
+                                 **kwargs)
+        first, last = start - lo, stop - lo
+        key[start:stop] = part["key"][first:last]
+        known[start:stop] = part["known"][first:last]
+        confidence[start:stop] = part["confidence"][first:last]
+        conflicts.extend(dict(c, position=c["position"] + lo)
+                         for c in part["conflicts"]
+                         if first <= c["position"] < last)
+        corroborated += (count_corroborated(part["votes"], last) -
+                         count_corroborated(part["votes"], first))
+        log(f"  columns {start}-{stop - 1}: "
+            f"{sum(part['known'][first:last])}/{stop - start} keystream bytes "
+            f"recovered ({time.perf_counter() - began:.2f}s)")
+    key = bytes(key)
+    return {
+        "key": key, "known": known, "confidence": confidence,
+        "plaintexts": decrypt_with_keystream(ciphertexts, key, known),
+        "conflicts": conflicts, "length": length, "recovered": sum(known),
+        "corroborated": corroborated,
     }
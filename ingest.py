@@ -0,0 +1,147 @@
+import glob
+import gzip
+import mmap
+import os
+import struct
+
+# Ways a ciphertext set can be laid out on disk:
+#   lines    - text, one hex- or binary-encoded ciphertext per line
+#   raw      - binary, the whole file is one ciphertext
+#   prefixed - binary, ciphertexts back to back, each after a 4-byte
+#              little-endian length
+LAYOUTS = ("lines", "raw", "prefixed")
+GZIP_MAGIC = b"\x1f\x8b"
+_HEX = b"0123456789abcdefABCDEF"
+# Bytes a "lines" file may contain at all (hex digits cover binary's 0 and 1).
+_TEXT = _HEX + b"xX \t\r\n"
+# How much of a file is sniffed to tell text from binary.
+SNIFF_BYTES = 4096
+_LENGTH = struct.Struct("<I")
+
+
+def expand_sources(sources):
+    """
+    Input paths for a list of files, directories and glob patterns. A
+    directory stands for every file directly in it, a pattern for every file
+    it matches, each group sorted by name so message order is reproducible.
+    """
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            paths.extend(sorted(entry.path for entry in os.scandir(source)
+                                if entry.is_file()))
+        elif glob.has_magic(source):
+            paths.extend(sorted(p for p in glob.glob(source)
+                                if os.path.isfile(p)))
+        else:
+            paths.append(source)
+    return paths
+
+
+def _load(path):
+    """
+    A file's contents: decompressed if it is gzipped, otherwise memory-mapped
+    rather than read, so slicing out a message is the only copy made.
+    """
+    with open(path, 'rb') as infile:
+        if infile.read(2) == GZIP_MAGIC:
+            infile.seek(0)
+            with gzip.GzipFile(fileobj=infile) as unzipped:
+                return unzipped.read()
+        if os.fstat(infile.fileno()).st_size == 0:
+            return b""  # an empty file can't be mapped
+        return mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def sniff_layout(data):
+    """"lines" if `data` starts out as hex/binary text, else "raw"."""
+    head = bytes(data[:SNIFF_BYTES])
+    return "lines" if not head.translate(None, _TEXT) else "raw"
+
+
+def _is_binary(line):
+    return len(line) % 8 == 0 and not line.translate(None, b"01")
+
+
+def decode_line(line, binary=False):
+    """
+    One hex-encoded (or with binary=True, binary-encoded) ciphertext, from a
+    stripped line of bytes, decoded by a single C-level call rather than digit
+    by digit. Hex may carry a '0x' prefix.
+    """
+    if binary:
+        if not _is_binary(line):
+            raise ValueError(f"Invalid line in file: {line.decode('latin-1')}")
+        return int(line, 2).to_bytes(len(line) // 8, "big")
+    digits = line[2:] if line[:2] in (b"0x", b"0X") else line
+    if digits.translate(None, _HEX) or len(digits) % 2:
+        raise ValueError(f"Invalid line in file: {line.decode('latin-1')}")
+    return bytes.fromhex(digits.decode("ascii"))
+
+
+def decode_lines(data):
+    """
+    Every non-blank line of a "lines" file, decoded (see `decode_line`).
+
+    A string of 0s and 1s is valid hex too, so the file is read as binary only
+    when every line is binary: a whole number of bytes of 0s and 1s.
+    """
+    data = data.read() if isinstance(data, mmap.mmap) else bytes(data)
+    lines = [line for line in map(bytes.strip, data.splitlines()) if line]
+    binary = bool(lines) and all(map(_is_binary, lines))
+    return [decode_line(line, binary) for line in lines]
+
+
+def split_prefixed(data, copy=True):
+    """
+    The ciphertexts of a "prefixed" file. With copy=False they are zero-copy
+    views of `data` (e.g. of its memory map) instead of bytes.
+    """
+    view = memoryview(data)
+    messages = []
+    pos = 0
+    while pos < len(view):
+        if pos + _LENGTH.size > len(view):
+            raise ValueError(f"Truncated length prefix at byte {pos}.")
+        (size,) = _LENGTH.unpack_from(view, pos)
+        pos += _LENGTH.size
+        if pos + size > len(view):
+            raise ValueError(f"Message at byte {pos} runs past the end "
+                             f"({size} bytes declared).")
+        message = view[pos:pos + size]
+        messages.append(bytes(message) if copy else message)
+        pos += size
+    return messages
+
+
+def read_ciphertexts(*sources, layout=None, copy=True):
+    """
+    Load a ciphertext set from any number of files, directories or glob
+    patterns, in order.
+
+    Each file is decoded according to `layout` (one of LAYOUTS), or, when that
+    is None, as "lines" if it looks like hex/binary text and as "raw" (one
+    message per file) otherwise. Gzipped files are decompressed transparently;
+    the rest are memory-mapped, not read. With copy=False, "raw" and
+    "prefixed" messages are returned as read-only views of their file's
+    mapping -- nothing is copied, but views can't be pickled (e.g. sent to a
+    Pool), so the default is to return bytes.
+
+    :return: A list of ciphertexts.
+    """
+    if layout is not None and layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout {layout!r}; expected one of "
+                         f"{', '.join(LAYOUTS)}.")
+    ciphertexts = []
+    for path in expand_sources(sources):
+        data = _load(path)
+        kind = layout or sniff_layout(data)
+        if kind == "lines":
+            ciphertexts.extend(decode_lines(data))
+        elif kind == "prefixed":
+            ciphertexts.extend(split_prefixed(data, copy))
+        else:
+            ciphertexts.append(bytes(data) if copy else memoryview(data))
+        if copy and isinstance(data, mmap.mmap):
+            data.close()
+    return ciphertexts
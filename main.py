@@ -1,20 +1,51 @@
-from utils import load_words, load_short_words, read_ciphertexts, split_set
-from xor_helpers import xor
-from decrypt import auto_crib_drag
-from reconstruct import write_report
-from expand import iterative_recover
+from utils import (load_words, load_short_words, cost_batches, column_windows,
+                   PLAUSIBLE_BYTES)
+from ingest import read_ciphertexts, LAYOUTS
+from xor_helpers import (XorMatrix, CiphertextSet, CACHE_DIR, TRIE_BACKEND,
+                         merge_command_cache)
+from decrypt import (init_drag_worker, drag_batch, crib_cost,
+                     init_window_worker, drag_window_task)
+from reconstruct import write_report, VoteTally, AdmissibleKeys
+from expand import iterative_recover, windowed_recover, WordIndex, MAX_TOKEN
+from wordlist import load_dictionary
+from seeding import seed_keystream, resolved_columns
+from querycache import file_hash
+import ngrams
+import profiling
 from pprint import pprint
+import argparse
 import time
 import psutil  # type: ignore
 import os
-from multiprocessing import Pool, Lock, Value
+from collections import defaultdict, deque
+from multiprocessing import Pool, Value
 
-# Lower the priority of the process
+# Lower the priority of the process (IDLE_PRIORITY_CLASS only exists on
+# Windows; elsewhere the lowest niceness does the same)
 p = psutil.Process(os.getpid())
-p.nice(psutil.IDLE_PRIORITY_CLASS)  # On Windows
+p.nice(psutil.IDLE_PRIORITY_CLASS if os.name == "nt" else 19)
 
 
-def main():
+def parse_args(argv=None):
+    """
+    Command line: ciphertext files, directories or glob patterns -- hex/binary
+    text, raw or length-prefixed binary, optionally gzipped (see
+    `ingest.read_ciphertexts`) -- and how they are laid out.
+    """
+    parser = argparse.ArgumentParser(
+        description="Recover plaintexts encrypted under a reused keystream.")
+    parser.add_argument("sources", nargs="*", default=["ciphertexts.txt"],
+                        help="ciphertext files, directories or glob patterns "
+                             "(default: %(default)s)")
+    parser.add_argument("--layout", choices=LAYOUTS,
+                        help="how every file is laid out (default: each file "
+                             "is read as lines if it looks like hex/binary "
+                             "text, else as one raw message; length-prefixed "
+                             "files are never detected, so pass 'prefixed')")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """
     The main entry point:
       - Read the ciphertexts
@@ -24,44 +55,51 @@ def main():
     """
     num_processes = os.cpu_count()
 
-    filename = "ciphertexts.txt"
-    ciphertexts = read_ciphertexts(filename)
+    args = parse_args(argv)
+    sources = args.sources
+    ciphertexts = read_ciphertexts(*sources, layout=args.layout)
     # The .10 tier (most common words) supplies cribs; english-words.all is the
     # full dictionary used for validation and word completion -- it matches the
     # word list the C++ trie loads, and is leaner/cleaner than the tier union
     # (which pulls in obscure inflections that create false candidates).
-    cribs_dict = load_words('dictionary/english-words.10')
+    CRIB_TIER = 'dictionary/english-words.10'
+    cribs_dict = load_words(CRIB_TIER)
     full_dict = load_words('dictionary/english-words.all')
     # Short words let the token validator segment patterns like 'of?ej'.
     full_dict |= load_short_words('dictionary/english-words.all')
+    # The same words, bucketed by length straight from the compiled dictionary.
+    index = WordIndex.from_dictionary(
+        load_dictionary('dictionary/english-words.all'))
+    if CACHE_DIR:
+        index.load_caches(CACHE_DIR)  # start from the last run's patterns
 
     if len(ciphertexts) < 2:
         print("Need at least two ciphertexts. Exiting.")
         return
 
-    print(f"Loaded {len(ciphertexts)} ciphertexts from {filename}.")
+    print(f"Loaded {len(ciphertexts)} ciphertexts from {', '.join(sources)}.")
     for idx, ct in enumerate(ciphertexts, start=1):
-        len_ct = len(ct)
         print(f"   {idx}. Ciphertext #{idx}, length={len(ct)} bytes")
+    # Messages may differ in length; each pair is restricted to its overlap.
+    len_ct = max(len(ct) for ct in ciphertexts)
 
-    # XOR the ciphertexts together
-    xor_data = {}
-    for idx, ct in enumerate(ciphertexts):
-        if idx + 1 == len(ciphertexts):
-            break
-        if f"p{idx+1}" not in xor_data:
-            xor_data[f"p{idx+1}"] = {}
-        for jdx in range(idx + 1, len(ciphertexts)):
-            if f"p{jdx+1}" not in xor_data:
-                xor_data[f"p{jdx+1}"] = {}
-            if f"p{jdx+1}" not in xor_data[f"p{idx+1}"]:
-                xor_data[f"p{idx+1}"][f"p{jdx+1}"] = {}
-            xor_data[f"p{idx+1}"][f"p{jdx+1}"] = {"name": f"x{idx+1}{jdx+1}",
-                                                  "result": xor(ct, ciphertexts[jdx])}
-            xor_data[f"p{jdx+1}"][f"p{idx+1}"] = {"name": f"x{idx+1}{jdx+1}",
-                                                  "result": xor(ct, ciphertexts[jdx])}
-
-    pprint(xor_data)
+    # Messages longer than this are crib dragged and recovered this many
+    # columns at a time (see `column_windows`), so memory stays flat however
+    # long they get.
+    WINDOW_COLUMNS = 4096
+    # Up to this many ciphertexts, XOR every pair up front (one contiguous store,
+    # each pair computed once) and print them. Past it the (N choose 2) pairs
+    # cost more than they save: drag against the ciphertexts directly, each
+    # crib placement decrypting the other messages as a keystream hypothesis.
+    PAIR_MATRIX_MAX = 16
+    if len_ct > WINDOW_COLUMNS:
+        matrix = None
+    elif (len(ciphertexts) <= PAIR_MATRIX_MAX
+          and all(len(ct) == len_ct for ct in ciphertexts)):
+        matrix = XorMatrix(ciphertexts)
+        pprint(matrix.as_dict())
+    else:
+        matrix = CiphertextSet(ciphertexts)
 
     # Minimum crib length to drag. Shorter cribs recover far more of the message
     # but add noise; corroboration (MIN_VOTES) plus the iterative word-completion
@@ -75,37 +113,195 @@ def main():
     # more (noisier) coverage; raise it for fewer, higher-confidence bytes.
     MIN_VOTES = 2
 
+    # Cribs go out in small batches of similar estimated cost (so a worker that
+    # finishes early just picks up the next batch) rather than one fixed chunk
+    # per worker.
+    BATCHES_PER_WORKER = 8
+    # Stream matches straight into keystream votes inside the workers, so only
+    # the (message-length bounded) tallies come back instead of every match.
+    # Set to False to collect the full match list instead.
+    STREAM_VOTES = True
+    # Worker processes for the expansion passes. Worth raising for many or long
+    # ciphertexts; on a handful of short ones, starting the workers costs more
+    # than the passes themselves. The result is the same either way.
+    EXPAND_PROCESSES = 1
+    # Set to True to checkpoint reconstruction progress under CACHE_DIR, so an
+    # interrupted run picks up where it stopped -- skipping the crib drag
+    # entirely. The checkpoint is deleted once the run finishes.
+    CHECKPOINT = False
+
     start_time = time.perf_counter()
     cribs = {w for w in cribs_dict if len(w) >= MIN_CRIB_LEN}
-    split_sets = split_set(cribs, num_processes)
-    with Pool(processes=num_processes) as pool:
-        tasks = [
-            (split_sets[i], xor_data, len_ct, len(ciphertexts), full_dict)
-            for i in range(num_processes)
-        ]
-        results = pool.starmap(auto_crib_drag, tasks)
-        all_matches = []
-        for matches in results:
-            all_matches.extend(matches)
-        # Sort for determinism: the worker split iterates a set, so match order
-        # (and thus vote tie-breaking) would otherwise vary between runs.
-        all_matches.sort(key=lambda m: (m["plaintext"], m["start"], m["crib"]))
-        print(f"Found {len(all_matches)} total potential matches!")
-
-    # Aggregate the matches into a keystream, then iteratively extend and
-    # spell-correct the recovered words until the result stops growing.
-    print("Reconstructing and expanding...")
-    result = iterative_recover(all_matches, ciphertexts, full_dict,
-                               min_votes=MIN_VOTES, interactive=True)
+    if matrix is None:
+        print(f"Crib dragging and reconstructing {WINDOW_COLUMNS} columns at "
+              f"a time...")
+        result = recover_windowed(ciphertexts, cribs, full_dict, index,
+                                  num_processes, WINDOW_COLUMNS, MIN_VOTES)
+    else:
+        # Key bytes that keep every message plausible, per position. Its
+        # per-message offset tables screen crib placements here, and expansion
+        # reuses (and narrows) the same table below.
+        admissible = AdmissibleKeys.from_ciphertexts(ciphertexts,
+                                                     PLAUSIBLE_BYTES)
+        masks = admissible.offset_masks(ciphertexts)
+        # With enough messages, many columns' key bytes can be read off the
+        # character statistics alone. They seed the votes, and the crib drag
+        # skips placements that lie entirely within them.
+        seed = seed_keystream(ciphertexts, admissible)
+        resolved = resolved_columns(seed)
+        print(f"Seeded {len(seed)}/{len_ct} keystream bytes from character "
+              f"statistics.")
+
+        def crib_drag():
+            """Drag every crib across the ciphertexts; the matches (or tally)."""
+            costs = {w: crib_cost(masks, w.encode("utf-8"), len_ct, resolved)
+                     for w in cribs}
+            batches = cost_batches(costs, num_processes * BATCHES_PER_WORKER)
+            with Pool(processes=num_processes, initializer=init_drag_worker,
+                      initargs=(matrix, len_ct, len(ciphertexts), full_dict,
+                                STREAM_VOTES, masks, resolved)) as pool:
+                results = [None] * len(batches)
+                tally = VoteTally()
+                # pid -> batches, cribs, secs
+                throughput = defaultdict(lambda: [0, 0, 0.0])
+                pool_start = time.perf_counter()
+                for (batch, pid, n_cribs, elapsed, matches,
+                     profile) in pool.imap_unordered(drag_batch,
+                                                     enumerate(batches)):
+                    profiling.merge(profile)
+                    if STREAM_VOTES:
+                        # associative: arrival order is irrelevant
+                        tally.merge(matches)
+                    else:
+                        results[batch] = matches
+                    stats = throughput[pid]
+                    stats[0] += 1
+                    stats[1] += n_cribs
+                    stats[2] += elapsed
+                # Let the workers exit normally so each writes its new query
+                # cache entries, then fold them into the snapshot once.
+                pool.close()
+                pool.join()
+                merge_command_cache()
+                for worker, (pid, (n_batches, n_cribs, busy)) in enumerate(
+                        sorted(throughput.items()), start=1):
+                    rate = n_cribs / busy if busy else 0.0
+                    print(f"   worker {worker} (pid {pid}): {n_batches} batches, "
+                          f"{n_cribs} cribs in {busy:.2f}s ({rate:.0f} cribs/s)")
+                if profiling.ENABLED:
+                    wall = time.perf_counter() - pool_start
+                    busy = sum(stats[2] for stats in throughput.values())
+                    profiling.add_time("drag.pool", wall)
+                    # Worker-seconds spent outside any batch: start-up, pickling,
+                    # queueing, and waiting on the last batches.
+                    profiling.add_time("drag.pool_overhead",
+                                       max(wall * num_processes - busy, 0.0))
+                    print("Crib drag profile:")
+                    for line in profiling.report(("drag.", "trie.")):
+                        print(line)
+                if STREAM_VOTES:
+                    all_matches = tally
+                    found = tally.matches
+                else:
+                    all_matches = []
+                    for matches in results:
+                        all_matches.extend(matches)
+                    # Sort for determinism: batches finish in any order, so
+                    # match order (and thus vote tie-breaking) would otherwise
+                    # vary between runs.
+                    all_matches.sort(
+                        key=lambda m: (m["plaintext"], m["start"], m["crib"]))
+                    found = len(all_matches)
+                print(f"Found {found} total potential matches!")
+            return all_matches
+
+        # Aggregate the matches into a keystream, then iteratively extend and
+        # spell-correct the recovered words until the result stops growing.
+        # A checkpoint is only resumed by a run with the same crib-drag
+        # settings.
+        print("Reconstructing and expanding...")
+        result = iterative_recover(crib_drag, ciphertexts, index,
+                                   min_votes=MIN_VOTES, interactive=True,
+                                   processes=EXPAND_PROCESSES,
+                                   admissible=admissible,
+                                   checkpoint_dir=(CACHE_DIR or None
+                                                   if CHECKPOINT else None),
+                                   checkpoint_key={
+                                       "min_crib_len": MIN_CRIB_LEN,
+                                       "crib_tier": file_hash(CRIB_TIER),
+                                       "stream_votes": STREAM_VOTES,
+                                       "min_score": ngrams.MIN_SCORE,
+                                       "trie_backend": TRIE_BACKEND},
+                                   seed=seed)
     print(f"Recovered {result['recovered']}/{result['length']} keystream bytes "
           f"({result['corroborated']} corroborated by >=2 matches).")
     for idx, pt in enumerate(result["plaintexts"], start=1):
         print(f"P{idx}: {pt}")
+    for name, stats in index.cache_stats().items():
+        print(f"   {name} cache: {stats['entries']} entries, "
+              f"{stats['hit_rate']:.1%} hits, {stats['evictions']} evictions")
+    if CACHE_DIR:
+        index.save_caches(CACHE_DIR)
     report_path = write_report(result, ciphertexts)
     print(f"Wrote full reconstruction report to {report_path}")
-    # auto_crib_drag(split_sets[0], xor_data, len_ct, len(ciphertexts), words[6])
     end_time = time.perf_counter()
     print(f"Execution time: {end_time - start_time:.6f} seconds")
+    if profiling.ENABLED:
+        path = profiling.save(extra={"elapsed_s": end_time - start_time,
+                                     "wordindex_caches": index.cache_stats()})
+        print(f"Wrote profile to {path}")
+
+
+def recover_windowed(ciphertexts, cribs, full_dict, index, num_processes,
+                     window, min_votes):
+    """
+    Crib drag and reconstruct very long (or ragged) messages `window` columns
+    at a time: the windows are dragged across a Pool, in order, while the
+    parent expands each one as its votes arrive. Each window is seeded from
+    its own character statistics first (see `seeding.seed_keystream`).
+    """
+    # Windows overlap by the longest crib or token, so nothing that decides a
+    # window's own columns is cut off at its edges.
+    overlap = max(max(len(w.encode("utf-8")) for w in cribs), MAX_TOKEN or 0)
+    windows = column_windows(max(len(ct) for ct in ciphertexts), window,
+                             overlap)
+    with Pool(processes=num_processes, initializer=init_window_worker,
+              initargs=(ciphertexts, cribs, full_dict, True)) as pool:
+        found = 0
+
+        def tallies():
+            """
+            Each window's tally, in order. At most two windows per worker are
+            submitted ahead of the one being expanded, so however far
+            expansion falls behind the drag, finished tallies can't pile up.
+            """
+            nonlocal found
+            tasks = enumerate(windows)
+            pending = deque()
+
+            def submit():
+                task = next(tasks, None)
+                if task is not None:
+                    pending.append(pool.apply_async(drag_window_task, (task,)))
+
+            for _ in range(2 * num_processes):
+                submit()
+            while pending:
+                _, _, _, tally, profile = pending.popleft().get()
+                submit()
+                profiling.merge(profile)
+                found += tally.matches
+                yield tally
+
+        result = windowed_recover(windows, tallies(), ciphertexts, index,
+                                  seeded=True, min_votes=min_votes)
+        # Let the workers exit normally so each writes its new query cache
+        # entries, then fold them into the snapshot once.
+        pool.close()
+        pool.join()
+        merge_command_cache()
+    print(f"Found {found} total potential matches!")
+    return result
 
 
 if __name__ == "__main__":
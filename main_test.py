@@ -0,0 +1,38 @@
+import struct
+
+import pytest
+
+pytest.importorskip("psutil")
+import main  # noqa: E402
+from ingest import read_ciphertexts  # noqa: E402
+
+MESSAGES = [b"\x8a\x30\x82\x60", b"\xe4\x14\xc6", b"\x78\x83\x9b\x60\xc8"]
+
+
+def _prefixed(path):
+    with open(path, 'wb') as out:
+        for message in MESSAGES:
+            out.write(struct.pack("<I", len(message)) + message)
+    return path
+
+
+def test_prefixed_layout_from_the_command_line(tmp_path):
+    path = _prefixed(tmp_path / "messages.bin")
+    args = main.parse_args([str(path), "--layout", "prefixed"])
+    assert args.layout == "prefixed"
+    assert read_ciphertexts(*args.sources, layout=args.layout) == MESSAGES
+
+
+def test_prefixed_file_is_not_sniffed(tmp_path):
+    # Without --layout a binary file is one raw message, headers and all.
+    path = _prefixed(tmp_path / "messages.bin")
+    args = main.parse_args([str(path)])
+    assert args.layout is None
+    assert read_ciphertexts(*args.sources, layout=args.layout) == [
+        path.read_bytes()]
+
+
+def test_defaults_and_unknown_layout():
+    assert main.parse_args([]).sources == ["ciphertexts.txt"]
+    with pytest.raises(SystemExit):
+        main.parse_args(["x.txt", "--layout", "csv"])
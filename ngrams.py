@@ -0,0 +1,169 @@
+import json
+import math
+import os
+import re
+import struct
+from array import array
+from collections import Counter
+
+from querycache import file_hash
+from wordlist import load_dictionary
+
+# Word lists the model is trained on, with the weight each of their words
+# gets: the smaller SCOWL size levels hold the commoner words.
+TIERS = {
+    "dictionary/english-words.10": 8,
+    "dictionary/english-words.20": 4,
+    "dictionary/english-words.35": 2,
+    "dictionary/english-words.50": 1,
+}
+# Where the compiled table is kept (rebuilt when a tier changes).
+MODEL_PATH = "dictionary/english-trigrams.compiled"
+MAGIC = b"MTPNGRM1"
+
+# Symbols: 0 is a word boundary (space, punctuation, anything not in a word),
+# 1-26 the letters in either case, 27 the apostrophe. Five bits each, so a
+# trigram indexes a flat table of 32 ** 3 entries.
+BITS = 5
+ALPHABET = 28
+_symbols = bytearray(256)
+for _i, _ch in enumerate("abcdefghijklmnopqrstuvwxyz", start=1):
+    _symbols[ord(_ch)] = _symbols[ord(_ch.upper())] = _i
+_symbols[ord("'")] = 27
+SYMBOLS = bytes(_symbols)
+# Every run of boundaries reads as exactly two, as the training words are
+# padded: then the trigrams across a space are "end of word" (x, 0, 0) and
+# "start of word" (0, 0, y), both of which the model has seen.
+_BOUNDARY_RUN = re.compile(b"\0+")
+# Log-probabilities are stored as int16 hundredths of a nat.
+SCALE = 100
+# Add-k smoothing for trigrams never seen in training.
+SMOOTHING = 0.1
+
+# Mean log-probability per trigram (in nats) below which a placement's derived
+# slices read as gibberish. Short slices of English score about -1.8 (5% below
+# -2.7); random plausible bytes about -4.8. Measured on the sample and on
+# synthetic 3-4 message corpora:
+#   -2.5 -> most precise, but drops true matches (122 -> 107 bytes on sample)
+#   -3.5 -> ~20% fewer matches to validate, same or better coverage (default)
+#   -4.5 -> rejects little
+MIN_SCORE = -3.5
+
+
+def symbols(slice):
+    """A slice's symbol string, with boundary runs normalised to two."""
+    return _BOUNDARY_RUN.sub(b"\0\0", slice.translate(SYMBOLS))
+
+
+class NgramModel:
+    """
+    Character trigram log-probabilities, trained on the dictionary tiers.
+
+    Each word is read padded with two boundaries on either side, so the model
+    knows how words start and end as well as how they continue. The table is
+    a flat array of 32 ** 3 int16 entries (64 KB), indexed by the three 5-bit
+    symbols of a trigram, so scoring a slice is one translate, one regex
+    substitution and a table lookup per character.
+    """
+
+    def __init__(self, table):
+        self.table = table
+
+    @classmethod
+    def build(cls, tiers=TIERS):
+        counts = Counter()
+        for path, weight in tiers.items():
+            compiled = load_dictionary(path)
+            for section in ("words", "short"):
+                for word in compiled.words(section):
+                    padded = b"\0\0" + word.encode("utf-8").translate(
+                        SYMBOLS) + b"\0\0"
+                    for i in range(len(padded) - 2):
+                        counts[padded[i:i + 3]] += weight
+        contexts = Counter()
+        for trigram, n in counts.items():
+            contexts[trigram[:2]] += n
+        size = 1 << (3 * BITS)
+        table = array('h', [0]) * size
+        for index in range(size):
+            a, b, c = index >> 2 * BITS, index >> BITS & 31, index & 31
+            if a >= ALPHABET or b >= ALPHABET or c >= ALPHABET:
+                continue
+            trigram = bytes((a, b, c))
+            p = ((counts[trigram] + SMOOTHING) /
+                 (contexts[trigram[:2]] + SMOOTHING * ALPHABET))
+            table[index] = round(SCALE * math.log(p))
+        return cls(table)
+
+    @staticmethod
+    def _sources(tiers):
+        return {path: file_hash(path) for path in tiers}
+
+    def save(self, path=MODEL_PATH, tiers=TIERS):
+        head = json.dumps({"tiers": tiers,
+                           "sources": self._sources(tiers)}).encode("utf-8")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as out:
+            out.write(MAGIC)
+            out.write(struct.pack("<I", len(head)))
+            out.write(head)
+            out.write(self.table.tobytes())
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path=MODEL_PATH, tiers=TIERS):
+        """The saved model, or None if it is missing or stale."""
+        try:
+            with open(path, 'rb') as infile:
+                data = infile.read()
+        except OSError:
+            return None
+        if data[:len(MAGIC)] != MAGIC:
+            return None
+        (head_len,) = struct.unpack_from("<I", data, len(MAGIC))
+        start = len(MAGIC) + 4
+        head = json.loads(data[start:start + head_len])
+        if head["tiers"] != tiers or head["sources"] != cls._sources(tiers):
+            return None
+        table = array('h')
+        table.frombytes(data[start + head_len:])
+        return cls(table)
+
+    def score(self, slice):
+        """
+        (total log-probability, trigram count) of a derived slice. Its edges
+        may cut words, so no boundary is assumed beyond them.
+        """
+        s = symbols(slice)
+        table = self.table
+        total = 0
+        for i in range(len(s) - 2):
+            total += table[s[i] << 2 * BITS | s[i + 1] << BITS | s[i + 2]]
+        return total / SCALE, max(len(s) - 2, 0)
+
+    def mean_score(self, slices):
+        """Mean log-probability per trigram over `slices`, or None if none."""
+        total = count = 0
+        for slice in slices:
+            t, n = self.score(slice)
+            total += t
+            count += n
+        return total / count if count else None
+
+
+_model = None
+
+
+def get_model():
+    """The shared trigram model, loaded (or built and saved) on first call."""
+    global _model
+    if _model is None:
+        _model = NgramModel.load()
+        if _model is None:
+            _model = NgramModel.build()
+            try:
+                _model.save()
+            except OSError:
+                pass  # read-only checkout: just rebuild it next time
+    return _model
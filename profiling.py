@@ -0,0 +1,136 @@
+import json
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Instrumentation is off unless MTP_PROFILE is set (e.g. MTP_PROFILE=1). Read
+# from the environment so Pool workers, which re-import this module, agree with
+# the parent. Hot paths test `profiling.ENABLED` before doing any work, so a
+# disabled run pays one attribute lookup per instrumented call.
+ENABLED = os.environ.get("MTP_PROFILE", "") not in ("", "0")
+# Where `save` writes the machine-readable profile by default.
+PROFILE_FILE = os.environ.get("MTP_PROFILE_FILE", "profile.json")
+
+_counters = Counter()
+_timers = {}    # name -> [calls, total seconds, longest]
+_series = {}    # name -> [seconds, ...] in the order recorded
+
+
+def enable(flag=True):
+    """Turn instrumentation on or off (also for Pool workers started later)."""
+    global ENABLED
+    ENABLED = flag
+    os.environ["MTP_PROFILE"] = "1" if flag else "0"
+
+
+def count(name, n=1):
+    _counters[name] += n
+
+
+def counter(name):
+    """Current value of a counter."""
+    return _counters[name]
+
+
+def add_time(name, seconds):
+    t = _timers.get(name)
+    if t is None:
+        _timers[name] = [1, seconds, seconds]
+    else:
+        t[0] += 1
+        t[1] += seconds
+        if seconds > t[2]:
+            t[2] = seconds
+
+
+def record(name, seconds):
+    """Time one occurrence of a phase, keeping every duration (e.g. per pass)."""
+    add_time(name, seconds)
+    _series.setdefault(name, []).append(seconds)
+
+
+@contextmanager
+def timer(name, series=False):
+    """Time the enclosed block under `name` (a no-op while disabled)."""
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if series:
+            record(name, elapsed)
+        else:
+            add_time(name, elapsed)
+
+
+def snapshot(reset=False):
+    """
+    Everything collected so far as a plain dict (picklable and JSON-ready).
+    With reset=True the collectors are emptied, so a Pool worker can ship what
+    it gathered per task and the parent `merge`s the deltas.
+    """
+    snap = {
+        "counters": dict(_counters),
+        "timers": {k: list(v) for k, v in _timers.items()},
+        "series": {k: list(v) for k, v in _series.items()},
+    }
+    if reset:
+        clear()
+    return snap
+
+
+def merge(snap):
+    """Fold a `snapshot` (e.g. from a worker) into this process's profile."""
+    if not snap:
+        return
+    _counters.update(snap["counters"])
+    for name, (calls, total, longest) in snap["timers"].items():
+        t = _timers.setdefault(name, [0, 0.0, 0.0])
+        t[0] += calls
+        t[1] += total
+        t[2] = max(t[2], longest)
+    for name, values in snap["series"].items():
+        _series.setdefault(name, []).extend(values)
+
+
+def clear():
+    _counters.clear()
+    _timers.clear()
+    _series.clear()
+
+
+def report(prefixes=None):
+    """
+    Human-readable summary lines: timers by total time, then counters --
+    only those whose name starts with one of `prefixes`, if given.
+    """
+    def wanted(name):
+        return prefixes is None or name.startswith(tuple(prefixes))
+
+    lines = []
+    for name, (calls, total, longest) in sorted(
+            _timers.items(), key=lambda item: -item[1][1]):
+        if not wanted(name):
+            continue
+        lines.append(f"  {name}: {total:.3f}s over {calls} "
+                     f"({1e3 * total / calls:.2f}ms avg, {1e3 * longest:.2f}ms max)")
+    for name, n in sorted(_counters.items()):
+        if not wanted(name):
+            continue
+        lines.append(f"  {name}: {n}")
+    return lines
+
+
+def save(path=None, extra=None):
+    """Write the profile (plus any `extra` fields) as JSON; returns the path."""
+    path = path or PROFILE_FILE
+    data = snapshot()
+    if extra:
+        data.update(extra)
+    with open(path, "w") as out:
+        json.dump(data, out, indent=2)
+    return path
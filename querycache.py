@@ -0,0 +1,161 @@
+import glob
+import hashlib
+import os
+import pickle
+import sys
+from collections import OrderedDict
+
+
+def file_hash(path):
+    """SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as infile:
+        for chunk in iter(lambda: infile.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class QueryCache:
+    """
+    Bounded LRU cache for trie query results, with hit/miss counters.
+
+    A drop-in for the plain dict the query functions memoized into: `get`
+    returns None on a miss. Once `maxsize` entries are held, each insert evicts
+    the least recently used one (maxsize=None disables the bound).
+
+    The cache can be saved to and loaded from disk. `save` merges with whatever
+    snapshot is already on disk; pass a `lock` to serialize merges between
+    processes. That rewrites the whole snapshot, so processes that only add to
+    it (e.g. crib-drag Pool workers) use `save_part` instead: each writes just
+    the entries it added to a part file of its own, which `load` folds in and
+    the next `save` merges into the snapshot and deletes.
+    """
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._fresh = set()         # keys put since construction (or clear)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key):
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        self._fresh.add(key)
+        self._evict()
+
+    def update(self, items):
+        for key, value in items:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self._fresh.add(key)
+        self._evict()
+
+    def _evict(self):
+        if self.maxsize is None:
+            return
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._data.clear()
+        self._fresh.clear()
+
+    def stats(self):
+        """Counters plus the current fill, e.g. for logging after a run."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._data),
+            "maxsize": self.maxsize,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def nbytes(self):
+        """Approximate bytes held by the cache and the keys/values it owns."""
+        return sys.getsizeof(self._data) + sum(
+            sys.getsizeof(k) + sys.getsizeof(v) for k, v in self._data.items())
+
+    def load(self, path):
+        """
+        Merge a saved snapshot, and any part files beside it (see
+        `save_part`), into the cache (entries already present win). Returns
+        the number of entries read; a missing file reads as empty.
+        """
+        return self._load(path)[0]
+
+    def _load(self, path):
+        saved = []
+        parts = []
+        for source in [path] + sorted(glob.glob(glob.escape(path) + ".*.part")):
+            try:
+                with open(source, 'rb') as infile:
+                    saved.extend(pickle.load(infile))
+            except (OSError, EOFError, pickle.UnpicklingError):
+                continue
+            if source != path:
+                parts.append(source)
+        if not saved:
+            return 0, parts
+        # Older entries go first so the ones already here stay most recent.
+        merged = OrderedDict(saved)
+        merged.update(self._data)
+        self._data = merged
+        self._evict()
+        return len(saved), parts
+
+    def save(self, path, lock=None):
+        """Merge the cache into the snapshot at `path` and write it atomically."""
+        if lock is not None:
+            with lock:
+                return self._save(path)
+        return self._save(path)
+
+    def _save(self, path):
+        _, parts = self._load(path)
+        self._write(path, list(self._data.items()))
+        for part in parts:   # merged into the snapshot now
+            os.remove(part)
+        return path
+
+    def save_part(self, path):
+        """
+        Write only the entries this cache added to `path`'s part file for this
+        process -- no lock, and no read or rewrite of the snapshot, so the cost
+        is the number of new entries. Returns the part's path, or None if
+        there was nothing new.
+        """
+        items = [(key, self._data[key]) for key in self._fresh
+                 if key in self._data]
+        if not items:
+            return None
+        part = f"{path}.{os.getpid()}.part"
+        self._write(part, items)
+        return part
+
+    @staticmethod
+    def _write(path, items):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as out:
+            pickle.dump(items, out, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
@@ -1,4 +1,6 @@
+from array import array
 from collections import Counter, defaultdict
+from multiprocessing.sharedctypes import RawArray
 
 # Placeholders used when rendering plaintexts for display.
 UNKNOWN = "_"       # keystream byte at this position was never recovered
@@ -10,7 +12,20 @@ def _plaintext_index(label):
     return int(label[1:]) - 1
 
 
-def collect_keystream_votes(matches, ciphertexts):
+# A seeded key byte (see `seeding.seed_keystream`) counts as this many crib
+# matches: enough to be accepted on its own at the usual min_votes, while
+# matches that disagree can still outvote it.
+SEED_VOTES = 2
+
+
+def add_seed_votes(votes, seed, weight=SEED_VOTES):
+    """Vote `weight` times for every {pos: (key_byte, confidence)} of a seed."""
+    for pos, (key_byte, _) in sorted(seed.items()):
+        add_vote(votes, pos, key_byte, weight)
+    return votes
+
+
+def collect_keystream_votes(matches, ciphertexts, seed=None):
     """
     Turn crib-drag matches into per-position votes for the shared keystream.
 
@@ -22,12 +37,15 @@ def collect_keystream_votes(matches, ciphertexts):
 
     Every match contributes such a hypothesis. Overlapping true matches agree
     on the same key byte and reinforce each other; scattered false positives
-    cast lone, low-count votes.
+    cast lone, low-count votes. A `seed` of statistically guessed key bytes
+    votes first (see `add_seed_votes`).
 
     Returns:
         dict[int, Counter]: position -> Counter of {key_byte: vote_count}.
     """
     votes = defaultdict(Counter)
+    if seed:
+        add_seed_votes(votes, seed)
     for m in matches:
         ct = ciphertexts[_plaintext_index(m["plaintext"])]
         crib = m["crib"].encode("utf-8")
@@ -38,12 +56,303 @@ def collect_keystream_votes(matches, ciphertexts):
     return votes
 
 
+class VoteTally:
+    """
+    Keystream votes folded in match by match, without keeping the matches.
+
+    Crib-drag workers add each match as it is found and return only the tally,
+    whose size is bounded by (messages x length x 256) instead of the number of
+    matches. Tallies merge associatively, so partial tallies from any number of
+    workers can be combined in any order.
+
+    A vote is recorded as the plaintext byte the crib puts at (message, pos);
+    `votes` turns those into key bytes once the ciphertexts are at hand. It also
+    remembers the earliest (plaintext, start, crib) behind every entry, so the
+    result is identical -- tie-breaking order included -- to running
+    `collect_keystream_votes` over the full match list sorted that way.
+    """
+
+    def __init__(self):
+        self.matches = 0
+        self._counts = Counter()    # (label, pos, byte) -> votes
+        self._first = {}            # (label, pos, byte) -> earliest sort key
+
+    def add(self, match):
+        """Fold one crib-drag match into the tally."""
+        self.matches += 1
+        label, start, crib = match["plaintext"], match["start"], match["crib"]
+        order = (label, start, crib)
+        for i, crib_byte in enumerate(crib.encode("utf-8")):
+            entry = (label, start + i, crib_byte)
+            self._counts[entry] += 1
+            first = self._first.get(entry)
+            if first is None or order < first:
+                self._first[entry] = order
+
+    def merge(self, other):
+        """Add another tally's votes into this one; returns self."""
+        self.matches += other.matches
+        self._counts.update(other._counts)
+        for entry, order in other._first.items():
+            first = self._first.get(entry)
+            if first is None or order < first:
+                self._first[entry] = order
+        return self
+
+    def votes(self, ciphertexts, seed=None):
+        """The tally as collect_keystream_votes output: {pos: Counter}."""
+        by_key = {}                 # (pos, key_byte) -> [first, count]
+        for entry, count in self._counts.items():
+            label, pos, crib_byte = entry
+            ct = ciphertexts[_plaintext_index(label)]
+            if pos >= len(ct):
+                continue
+            slot = by_key.setdefault((pos, ct[pos] ^ crib_byte),
+                                     [self._first[entry], 0])
+            slot[0] = min(slot[0], self._first[entry])
+            slot[1] += count
+        votes = defaultdict(Counter)
+        if seed:
+            add_seed_votes(votes, seed)
+        # Insert key bytes in the order the sorted match list would first
+        # vote for them, which is what Counter.most_common breaks ties by.
+        for (pos, key_byte), (first, count) in sorted(
+                by_key.items(), key=lambda item: (item[1][0], item[0])):
+            votes[pos][key_byte] += count
+        return votes
+
+
+class VoteMatrix:
+    """
+    Dense alternative to the {pos: Counter} votes: a length x 256 table of
+    vote counts in flat integer arrays.
+
+    Alongside the counts it keeps, per position, the running total, the winning
+    key byte and its count, updated as votes are added -- so picking winners,
+    confidence and support for every position is a single linear sweep, with no
+    per-position `most_common()` or `sum()`. Ties go to the key byte that was
+    voted for first at that position, exactly as Counter.most_common breaks
+    them, so results match the Counter form.
+    """
+
+    def __init__(self, length):
+        self.length = length
+        self.counts = array('q', bytes(8 * 256 * length))
+        self.totals = array('q', bytes(8 * length))
+        self.best = array('h', [-1]) * length
+        self.best_count = array('q', bytes(8 * length))
+        self._stamps = array('q', bytes(8 * 256 * length))   # 0 = no vote yet
+        self._clock = 0
+
+    @classmethod
+    def from_votes(cls, votes, length):
+        """Build from collect_keystream_votes output (positions >= length dropped)."""
+        matrix = cls(length)
+        for pos, counter in votes.items():
+            if pos < length:
+                for key_byte, count in counter.items():
+                    matrix.add(pos, key_byte, count)
+        return matrix
+
+    def to_votes(self):
+        """The {pos: Counter} form, in the same insertion order."""
+        votes = defaultdict(Counter)
+        for pos in range(self.length):
+            if self.totals[pos]:
+                for key_byte, count in self.candidates(pos):
+                    votes[pos][key_byte] = count
+        return votes
+
+    def add(self, pos, key_byte, weight):
+        i = pos * 256 + key_byte
+        if not self._stamps[i]:
+            self._clock += 1
+            self._stamps[i] = self._clock
+        count = self.counts[i] + weight
+        self.counts[i] = count
+        self.totals[pos] += weight
+        best = self.best[pos]
+        if best < 0 or count > self.best_count[pos] or (
+                count == self.best_count[pos]
+                and self._stamps[i] < self._stamps[pos * 256 + best]):
+            self.best[pos] = key_byte
+            self.best_count[pos] = count
+
+    def count(self, pos, key_byte):
+        return self.counts[pos * 256 + key_byte]
+
+    def remove(self, pos, key_byte):
+        """Drop every vote for `key_byte` at `pos` (like Counter.pop)."""
+        i = pos * 256 + key_byte
+        self.totals[pos] -= self.counts[i]
+        self.counts[i] = 0
+        self._stamps[i] = 0
+        if self.best[pos] == key_byte:
+            ranked = self.candidates(pos)
+            self.best[pos] = ranked[0][0] if ranked else -1
+            self.best_count[pos] = ranked[0][1] if ranked else 0
+
+    def candidates(self, pos):
+        """[(key_byte, count), ...] at `pos`, ordered like most_common()."""
+        base = pos * 256
+        voted = [b for b in range(256) if self._stamps[base + b]]
+        voted.sort(key=lambda b: (-self.counts[base + b], self._stamps[base + b]))
+        return [(b, self.counts[base + b]) for b in voted]
+
+    def recover(self, length, min_votes=1):
+        """recover_keystream for the dense form."""
+        key = bytearray(length)
+        known = [False] * length
+        confidence = [0.0] * length
+        for pos in range(min(length, self.length)):
+            winning = self.best_count[pos]
+            if not self.totals[pos] or winning < min_votes:
+                continue
+            key[pos] = self.best[pos]
+            known[pos] = True
+            confidence[pos] = winning / self.totals[pos]
+        return bytes(key), known, confidence
+
+    def conflicts(self, threshold=0.6):
+        """find_conflicts for the dense form."""
+        return [{"position": pos, "candidates": self.candidates(pos)}
+                for pos in range(self.length)
+                if self.totals[pos] > 1
+                and self.best_count[pos] / self.totals[pos] < threshold]
+
+    def corroborated(self, length):
+        """Positions whose winning key byte has at least two votes."""
+        return sum(1 for pos in range(min(length, self.length))
+                   if self.best_count[pos] >= 2)
+
+
+class AdmissibleKeys:
+    """
+    Which keystream bytes are still possible at each position: a length x 256
+    bitmap, one bit per (position, key byte), 32 bytes per position.
+
+    A key byte is admissible at a position when it decrypts every ciphertext
+    there to an allowed character. The table is built once per ciphertext set
+    and shared by crib dragging (see `offset_masks`) and expansion (see
+    `allows_all`); `block` clears the bytes retraction rules out, so both see
+    the same shrinking set.
+    """
+
+    def __init__(self, length, bits=None):
+        self.length = length
+        self.bits = bits if bits is not None else bytearray(32 * length)
+
+    @classmethod
+    def from_ciphertexts(cls, ciphertexts, allowed):
+        """Admissible key bytes for `ciphertexts`, given the allowed plaintext bytes."""
+        length = max((len(ct) for ct in ciphertexts), default=0)
+        # by_byte[c]: bit k set when ciphertext byte c ^ key byte k is allowed.
+        by_byte = [sum(1 << (c ^ a) for a in allowed) for c in range(256)]
+        table = cls(length)
+        for pos in range(length):
+            row = (1 << 256) - 1
+            for ct in ciphertexts:
+                if pos < len(ct):
+                    row &= by_byte[ct[pos]]
+            table.bits[32 * pos:32 * pos + 32] = row.to_bytes(32, "little")
+        return table
+
+    def shared(self):
+        """A copy whose bits live in shared memory, for handing to a Pool."""
+        bits = RawArray('B', len(self.bits))
+        bits[:] = bytes(self.bits)
+        return AdmissibleKeys(self.length, bits)
+
+    def allows(self, pos, key_byte):
+        return (0 <= pos < self.length and 0 <= key_byte < 256
+                and self.bits[32 * pos + (key_byte >> 3)] >> (key_byte & 7) & 1)
+
+    def allows_all(self, proposal):
+        """True if every {pos: (key_byte, ...)} of a proposal is admissible."""
+        bits, length = self.bits, self.length
+        for pos, (key_byte, *_) in proposal.items():
+            if not (0 <= pos < length and 0 <= key_byte < 256
+                    and bits[32 * pos + (key_byte >> 3)] >> (key_byte & 7) & 1):
+                return False
+        return True
+
+    def block(self, pos, key_byte):
+        """Rule `key_byte` out at `pos`."""
+        if 0 <= pos < self.length:
+            self.bits[32 * pos + (key_byte >> 3)] &= ~(1 << (key_byte & 7)) & 0xFF
+
+    def row(self, pos):
+        """The admissible key bytes at `pos` as a 256-bit integer."""
+        return int.from_bytes(bytes(self.bits[32 * pos:32 * pos + 32]), "little")
+
+    def offset_masks(self, ciphertexts):
+        """
+        Crib-drag screening tables, in the form `plausible_offsets` takes.
+
+        For each message `i`: one table of 256 bit vectors, where bit `p` of
+        `table[c]` is set when placing crib byte `c` at `p` in message `i`
+        implies an admissible key byte there. One table per message replaces
+        the per-pair tables of `byte_class_masks` and gives the same screen.
+        Columns no other message covers are left clear: a crib placed there
+        derives nothing, so nothing would speak for it.
+        """
+        lengths = sorted((len(ct) for ct in ciphertexts), reverse=True)
+        masks = []
+        for ct in ciphertexts:
+            # The longest other message; coverage is a prefix, so it bounds
+            # the columns some other message reaches.
+            other = lengths[1] if len(ct) == lengths[0] else lengths[0]
+            table = [0] * 256
+            for p, byte in enumerate(ct[:min(self.length, other)]):
+                row, bit = self.row(p), 1 << p
+                while row:
+                    low = row & -row
+                    table[(low.bit_length() - 1) ^ byte] |= bit
+                    row ^= low
+            masks.append([table])
+        return masks
+
+
+def add_vote(votes, pos, key_byte, weight):
+    """Add `weight` votes for `key_byte` at `pos`, in either votes form."""
+    if isinstance(votes, VoteMatrix):
+        votes.add(pos, key_byte, weight)
+    else:
+        votes[pos][key_byte] += weight
+
+
+def vote_count(votes, pos, key_byte):
+    """Votes for `key_byte` at `pos`, in either votes form."""
+    if isinstance(votes, VoteMatrix):
+        return votes.count(pos, key_byte)
+    counter = votes.get(pos)
+    return counter.get(key_byte, 0) if counter else 0
+
+
+def drop_vote(votes, pos, key_byte):
+    """Remove every vote for `key_byte` at `pos`, in either votes form."""
+    if isinstance(votes, VoteMatrix):
+        votes.remove(pos, key_byte)
+        return
+    votes[pos].pop(key_byte, None)
+    if not votes[pos]:
+        del votes[pos]  # don't leave an empty Counter behind
+
+
+def count_corroborated(votes, length):
+    """Positions backed by two or more agreeing votes, in either votes form."""
+    if isinstance(votes, VoteMatrix):
+        return votes.corroborated(length)
+    return sum(1 for pos, c in votes.items()
+               if pos < length and c and c.most_common(1)[0][1] >= 2)
+
+
 def recover_keystream(votes, length, min_votes=1):
     """
     Pick the winning key byte at each position by majority vote.
 
     Args:
-        votes: output of collect_keystream_votes.
+        votes: output of collect_keystream_votes, or a VoteMatrix.
         length: total keystream length to reconstruct.
         min_votes: minimum number of agreeing votes required to accept a byte.
 
@@ -53,6 +362,8 @@ def recover_keystream(votes, length, min_votes=1):
           known      - list[bool], True where a byte was accepted
           confidence - list[float], winning_votes / total_votes per position
     """
+    if isinstance(votes, VoteMatrix):
+        return votes.recover(length, min_votes)
     key = bytearray(length)
     known = [False] * length
     confidence = [0.0] * length
@@ -104,6 +415,8 @@ def find_conflicts(votes, threshold=0.6):
         list[dict]: {position, candidates: [(key_byte, count), ...]} sorted by
         position, useful for manually adjudicating ambiguous spots.
     """
+    if isinstance(votes, VoteMatrix):
+        return votes.conflicts(threshold)
     conflicts = []
     for pos in sorted(votes):
         counter = votes[pos]
@@ -134,8 +447,7 @@ def reconstruct(matches, ciphertexts, min_votes=1):
 
     recovered = sum(known)
     # Positions backed by two or more agreeing matches are far more trustworthy.
-    corroborated = sum(1 for pos, c in votes.items()
-                       if pos < length and c.most_common(1)[0][1] >= 2)
+    corroborated = count_corroborated(votes, length)
 
     return {
         "key": key,
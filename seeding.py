@@ -0,0 +1,118 @@
+import math
+from collections import Counter
+
+from reconstruct import AdmissibleKeys
+from utils import PLAUSIBLE_BYTES
+
+# Relative frequencies (percent) of letters in English prose.
+LETTER_FREQUENCY = {
+    "a": 8.2, "b": 1.5, "c": 2.8, "d": 4.3, "e": 12.7, "f": 2.2, "g": 2.0,
+    "h": 6.1, "i": 7.0, "j": 0.15, "k": 0.77, "l": 4.0, "m": 2.4, "n": 6.7,
+    "o": 7.5, "p": 1.9, "q": 0.095, "r": 6.0, "s": 6.3, "t": 9.1, "u": 2.8,
+    "v": 0.98, "w": 2.4, "x": 0.15, "y": 2.0, "z": 0.074,
+}
+# Share of characters that are spaces, capitals and punctuation; the rest are
+# lowercase letters.
+SPACE_SHARE = 0.18
+UPPER_SHARE = 0.03
+PUNCTUATION_SHARE = {",": 0.010, ".": 0.009, "'": 0.003, '"': 0.002,
+                     "?": 0.001, "!": 0.001, ";": 0.0005, ":": 0.0005}
+# Log-probability of any other byte: rare, but not impossible.
+FLOOR = math.log(1e-6)
+
+# A column is only scored once this many messages cover it; with fewer, the
+# statistics can't tell the right key byte from the ones next to it.
+MIN_MESSAGES = 8
+# Posterior probability the best key byte must reach to be proposed.
+MIN_CONFIDENCE = 0.99
+
+
+def _byte_log_probabilities():
+    lower = 1.0 - SPACE_SHARE - UPPER_SHARE - sum(PUNCTUATION_SHARE.values())
+    total = sum(LETTER_FREQUENCY.values())
+    probs = {" ": SPACE_SHARE, **PUNCTUATION_SHARE}
+    for letter, freq in LETTER_FREQUENCY.items():
+        probs[letter] = lower * freq / total
+        probs[letter.upper()] = UPPER_SHARE * freq / total
+    table = [FLOOR] * 256
+    for char, p in probs.items():
+        table[ord(char)] = math.log(p)
+    return table
+
+
+# Log-probability of each plaintext byte under the character model above.
+BYTE_LOGP = _byte_log_probabilities()
+
+
+def score_column(column, candidates):
+    """
+    Log-likelihood of every candidate key byte for one column.
+
+    `column` holds the ciphertext bytes of every message at that position and
+    `candidates` is a 256-bit integer of the key bytes to score (see
+    `AdmissibleKeys.row`). Each distinct ciphertext byte is scored once and
+    weighted by how often it occurs, so the cost is per distinct byte, not
+    per message.
+
+    This is deliberately not vectorized: the repo has no numpy dependency,
+    and with the per-distinct-byte weighting a column costs at most
+    candidates x distinct bytes table lookups, which plain Python handles.
+
+    :return: A dict of key byte -> log-likelihood.
+    """
+    counts = Counter(column).items()
+    scores = {}
+    while candidates:
+        low = candidates & -candidates
+        key_byte = low.bit_length() - 1
+        scores[key_byte] = sum(n * BYTE_LOGP[c ^ key_byte] for c, n in counts)
+        candidates ^= low
+    return scores
+
+
+def seed_keystream(ciphertexts, admissible=None, min_messages=MIN_MESSAGES,
+                   min_confidence=MIN_CONFIDENCE):
+    """
+    Propose key bytes from character statistics alone, before any crib drag.
+
+    With enough messages a column's key byte shows through the plaintext
+    statistics: XORed with the right byte, the column decrypts to mostly
+    spaces and lowercase letters (a space flips a letter's case bit, which is
+    what makes the wrong neighbours unlikely). Every admissible key byte of a
+    column is scored under the character model of BYTE_LOGP, and the best is
+    proposed when its posterior probability against the others reaches
+    `min_confidence`.
+
+    :param ciphertexts: The ciphertexts (of any lengths).
+    :param admissible: Their AdmissibleKeys table (built here if None).
+    :return: A dict of position -> (key byte, confidence), for the columns the
+             statistics resolve; seed votes with it (see
+             `reconstruct.add_seed_votes`).
+    """
+    if admissible is None:
+        admissible = AdmissibleKeys.from_ciphertexts(ciphertexts,
+                                                     PLAUSIBLE_BYTES)
+    seeds = {}
+    for pos in range(admissible.length):
+        column = bytes(ct[pos] for ct in ciphertexts if pos < len(ct))
+        # A column only one message reaches has no other message to check
+        # the guess against, whatever min_messages says.
+        if len(column) < max(min_messages, 2):
+            continue
+        scores = score_column(column, admissible.row(pos))
+        if not scores:
+            continue
+        best = max(scores, key=scores.get)
+        top = scores[best]
+        confidence = 1.0 / sum(math.exp(s - top) for s in scores.values())
+        if confidence >= min_confidence:
+            seeds[pos] = (best, confidence)
+    return seeds
+
+
+def resolved_columns(seeds):
+    """The seeded positions as a bit vector (bit p set when p is seeded)."""
+    mask = 0
+    for pos in seeds:
+        mask |= 1 << pos
+    return mask
@@ -1,6 +1,31 @@
+import re
 import string
 from itertools import islice
 
+import ingest
+from wordlist import load_dictionary
+
+# Punctuation `is_printable_ascii` accepts (kept verbatim as the character class
+# it was written as, so '[', ']' and '\\' are accepted too).
+PUNCTUATION = r'[!,.:;\'"?]'
+_PRINTABLE = (string.ascii_letters + PUNCTUATION + " ").encode()
+
+# 256-entry byte-class table for the plausibility prefilter (`plausible_slice`):
+# translating a slice through it yields one class byte per input byte, so whole
+# slices are classified in a single C-level pass with no decoding. Bytes that
+# never occur in a plaintext map to b"\0".
+LETTER, SPACE, STOP, APOSTROPHE, QUOTE = b"L", b" ", b"P", b"A", b"Q"
+_classes = bytearray(256)
+for _chars, _cls in ((string.ascii_letters, LETTER), (" ", SPACE),
+                     ("!,.:;?", STOP), ("'", APOSTROPHE), ('"', QUOTE)):
+    for _ch in _chars:
+        _classes[ord(_ch)] = _cls[0]
+BYTE_CLASS = bytes(_classes)
+# Byte values a derived plaintext slice may contain.
+PLAUSIBLE_BYTES = frozenset(b for b in range(256) if BYTE_CLASS[b])
+# No English word has the same letter three times in a row.
+_LETTER_RUN = re.compile(rb"([A-Za-z])\1\1")
+
 
 def split_set(s, n):
     """ Splits a set into `n` roughly equal contiguous parts. """
@@ -18,27 +43,68 @@ def split_set(s, n):
     return chunks
 
 
+def cost_batches(costs, n):
+    """
+    Split weighted items into about `n` batches of similar total cost.
+
+    Items are taken most expensive first and a batch is closed once it reaches
+    the average cost, so the batches come out roughly in decreasing cost order.
+    Dispatching them in that order keeps the long tasks from landing last.
+
+    :param costs: Mapping of item -> estimated cost.
+    :param n: Desired number of batches.
+    :return: A list of lists of items.
+    """
+    items = sorted(costs, key=lambda item: (-costs[item], item))
+    target = sum(costs.values()) / max(n, 1)
+    batches, batch, spent = [], [], 0
+    for item in items:
+        batch.append(item)
+        spent += costs[item]
+        if spent >= target:
+            batches.append(batch)
+            batch, spent = [], 0
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def column_windows(length, window, overlap):
+    """
+    Cover columns [0, length) with consecutive windows of `window` columns.
+
+    Each window owns the columns [start, stop) and reads [lo, hi): `overlap`
+    more on either side, clipped to [0, length), so that anything crossing one
+    of its edges (a crib, a token) is still seen whole from inside it.
+
+    :param length: Number of columns (the longest message).
+    :param window: Columns owned by each window.
+    :param overlap: Extra columns read on each side.
+    :return: A list of (lo, hi, start, stop) tuples.
+    """
+    windows = []
+    for start in range(0, length, window):
+        stop = min(start + window, length)
+        windows.append((max(start - overlap, 0), min(stop + overlap, length),
+                        start, stop))
+    return windows
+
+
 def load_words(file_path, previous_words=[]):
     """
-    Reads a SCOWL word list from a text file and returns a set of words.
-    Skips words that cannot be decoded in UTF-8.
+    Reads a SCOWL word list and returns a set of its lowercase words (longer
+    than 2 letters). Skips words that cannot be decoded in UTF-8.
+
+    Words come from the list's compiled form (see `wordlist`), which is built
+    once and rebuilt only when the source file changes.
 
     :param file_path: Path to the SCOWL word list file.
     :param previous_words: List of previously loaded word sets to avoid duplicates.
     :return: A set containing all words from the file.
     """
-    words = set()
-    with open(file_path, 'rb') as infile:
-        for line in infile:
-            try:
-                # Decode to utf-8 and remove any extra whitespace
-                decoded_line = line.decode('utf-8').strip().lower()
-                seen = any(
-                    decoded_line in words_set for words_set in previous_words)
-                if decoded_line and len(decoded_line) > 2 and not seen:
-                    words.add(decoded_line)
-            except UnicodeDecodeError:
-                continue
+    words = set(load_dictionary(file_path).words("words"))
+    for words_set in previous_words:
+        words -= words_set
     return words
 
 
@@ -53,43 +119,16 @@ def load_short_words(file_path):
     :param file_path: Path to the SCOWL word list file.
     :return: A set of lowercase words of length 1 or 2.
     """
-    short = {'a', 'i', 'o'}
-    with open(file_path, 'rb') as infile:
-        for line in infile:
-            try:
-                word = line.decode('utf-8').strip().lower()
-            except UnicodeDecodeError:
-                continue
-            if 1 <= len(word) <= 2 and word.isalpha():
-                short.add(word)
-    return short
+    return set(load_dictionary(file_path).words("short"))
 
 
 def read_ciphertexts(filename):
     """
     Reads lines from 'filename', each line is assumed to be hex-encoded or binary-encoded ciphertext.
-    Returns a list of bytes objects, one per line.
+    Returns a list of bytes objects, one per line. (See `ingest.read_ciphertexts`
+    for raw, compressed and multi-file input.)
     """
-    ciphertexts = []
-
-    with open(filename, 'r') as infile:
-        for line in infile:
-            line = line.strip()
-
-            if not line:
-                continue
-
-            if is_hex_string(line):
-                ciphertexts.append(bytes.fromhex(line))
-
-            elif len(line) % 8 == 0 and all(c in '01' for c in line):
-                byte_array = [int(line[i:i+8], 2)
-                              for i in range(0, len(line), 8)]
-                ciphertexts.append(bytes(byte_array))
-            else:
-                raise ValueError(f"Invalid line in file: {line}")
-
-    return ciphertexts
+    return ingest.read_ciphertexts(filename, layout="lines")
 
 
 def is_hex_string(s):
@@ -127,40 +166,77 @@ def is_binary_string(s):
 
 def is_printable_ascii(s):
     """
-    Returns True if all characters in the input are printable ASCII
-    and ensures that guessed substrings:
-    - Do not have unsupported symbols or numbers at the start or end (except for ', . ').
-    - Do not have random numbers or unsupported symbols between letters.
+    Returns True if every byte of `s` is a letter, a space, or one of the
+    punctuation characters in PUNCTUATION. Checked with a single bytes.translate
+    deletion pass instead of decoding and scanning character by character.
     """
-    try:
-        text = s.decode(
-            'utf-8')  # Decode bytes to string, ignoring errors
-    except:
-        return False
-    punc = r'[!,.:;\'"?]'
-    allowed_characters = string.ascii_letters + punc + " "
+    return not s.translate(None, _PRINTABLE)
 
-    # Ensure all characters are printable ASCII
-    if not all(c in allowed_characters for c in text):
-        return False
 
-    return True
+def plausible_slice(slice):
+    """
+    Cheap structural screen for a derived plaintext slice, run before any word
+    lookup. Rejects slices containing a byte no plaintext contains, sentence
+    punctuation glued to a following letter ('a.b', 'x,y'), a double quote
+    between letters, or a letter repeated three times in a row.
+
+    :param slice: The derived plaintext slice (bytes).
+    :return: False if the slice cannot be English text.
+    """
+    classes = slice.translate(BYTE_CLASS)
+    if b"\0" in classes:
+        return False
+    if STOP + LETTER in classes or LETTER + QUOTE + LETTER in classes:
+        return False
+    return _LETTER_RUN.search(slice) is None
 
 
 def valid_string(send_command, slice, word, dict, type_="suffix"):
     if not is_printable_ascii(word):
         return False
     # `word` is bytes; the dictionary holds str, so decode before lookup.
-    word_str = word.decode("utf-8")
-    is_word = word_str in dict
     # Use "count" (returns a single number) rather than "search" (returns the
     # full list of matching word indices) -- we only need existence here.
-    if type_ == "suffix" and send_command(
-            "count", "suffix", word_str)["count"] == 0:
+    count = send_command("count", type_, word.decode("utf-8"))["count"]
+    return _token_fits(slice, word, dict, count)
+
+
+def valid_tokens(send_commands, slice, dict):
+    """
+    Validate every token of a derived slice, with one batched trie request.
+
+    Equivalent to calling `valid_string` on each token in turn -- the first as a
+    "suffix" (it may be the tail of a word cut off by the slice edge), the rest
+    as a "prefix" -- and stopping at the first failure.
+
+    :param send_commands: Batch query function, e.g. `xor_helpers.send_commands`.
+    :param slice: The derived plaintext slice (bytes).
+    :param dict: Set of dictionary words.
+    :return: True if every token is plausible.
+    """
+    if not plausible_slice(slice):
         return False
-    elif type_ == "prefix" and send_command(
-            "count", "prefix", word_str)["count"] == 0:
+    words = slice.split()
+    # Only tokens up to the first unprintable one would ever be looked up.
+    checked = []
+    for word in words:
+        if not is_printable_ascii(word):
+            break
+        checked.append(word)
+    types = ["suffix"] + ["prefix"] * (len(checked) - 1)
+    results = send_commands([("count", type_, word.decode("utf-8"))
+                             for type_, word in zip(types, checked)])
+    for word, result in zip(checked, results):
+        if not _token_fits(slice, word, dict, result["count"]):
+            return False
+    return len(checked) == len(words)
+
+
+def _token_fits(slice, word, dict, count):
+    """Shared tail of token validation, given the trie's count for `word`."""
+    if count == 0:
         return False
+    is_word = word.decode("utf-8") in dict
     idx = slice.find(word)
     if idx != -1:
         # Indexing bytes yields ints, so compare against ord(" ").
@@ -0,0 +1,237 @@
+import json
+import mmap
+import os
+import struct
+from array import array
+
+from querycache import file_hash
+
+# Compiled dictionaries live next to their source list, e.g.
+# dictionary/english-words.all -> dictionary/english-words.all.compiled
+SUFFIX = ".compiled"
+MAGIC = b"MTPDICT3"
+# Separates words in every section (and in the text the suffix array indexes).
+SEP = "\n"
+
+# Sections stored in a compiled dictionary, with the encoding of their words:
+#   raw   - stripped lines exactly as the C++ trie stores them (any bytes), in
+#           file order with duplicates, so word indices and counts are its own
+#   words - the `utils.load_words` view: UTF-8, lowercased, longer than 2
+#   short - the `utils.load_short_words` view: 1-2 letter alphabetic words
+SECTIONS = {"raw": "latin-1", "words": "utf-8", "short": "utf-8"}
+
+
+def compiled_path(source_path):
+    return source_path + SUFFIX
+
+
+def _views(data):
+    """Split a word list's bytes into the words stored per section."""
+    raw, words, short = [], set(), {"a", "i", "o"}
+    for line in data.split(b"\n"):
+        # Like the C++ loader: skip empty lines, then strip what is kept.
+        if line:
+            raw.append(line.strip().decode("latin-1"))
+        try:
+            word = line.decode("utf-8").strip().lower()
+        except UnicodeDecodeError:
+            continue
+        if len(word) > 2:
+            words.add(word)
+        elif 1 <= len(word) <= 2 and word.isalpha():
+            short.add(word)
+    return {"raw": raw, "words": words, "short": short}
+
+
+def build_suffix_array(text, words):
+    """
+    Offsets of every suffix of every word in `text` (the words joined by SEP),
+    sorted by the suffix's characters up to the end of its word.
+    """
+    offsets = array('i')
+    ends = array('i')
+    pos = 0
+    for w in words:
+        end = pos + len(w)
+        offsets.extend(range(pos, end))
+        ends.extend([end] * len(w))
+        pos = end + 1
+    order = sorted(range(len(offsets)),
+                   key=lambda k: text[offsets[k]:ends[k]])
+    return array('i', (offsets[k] for k in order))
+
+
+def compile_dictionary(source_path, path=None):
+    """
+    Compile a word list into a sorted, deduplicated, length-bucketed file.
+
+    Each section stores its words sorted by (length, word), SEP-terminated, with
+    a table of where each length bucket starts, so a bucket is one slice of the
+    memory-mapped file. The raw section is the exception: it keeps the source's
+    lines as they are (and so has no buckets), and carries its suffix array and
+    its sort order (word indices in sorted word order) for `WordTrie`. The source file's size, mtime and hash are recorded so a stale
+    artifact is detected and rebuilt.
+
+    :param source_path: Path to the SCOWL word list.
+    :param path: Output path (default: next to the source list).
+    :return: The path written.
+    """
+    path = path or compiled_path(source_path)
+    with open(source_path, 'rb') as infile:
+        data = infile.read()
+
+    views = _views(data)
+    blobs = []
+    header = {"source_sha256": file_hash(source_path),
+              "source_stat": source_stat(source_path), "sections": {}}
+    offset = 0
+    for name, encoding in SECTIONS.items():
+        if name == "raw":
+            words = views[name]
+        else:
+            words = sorted(views[name], key=lambda w: (len(w), w))
+        buckets = {}
+        parts = []
+        size = 0
+        for w in words:
+            encoded = (w + SEP).encode(encoding)
+            if name != "raw":
+                bucket = buckets.setdefault(len(w), [size, 0, 0])
+                bucket[1] += 1
+                bucket[2] += len(encoded)
+            parts.append(encoded)
+            size += len(encoded)
+        blob = b"".join(parts)
+        header["sections"][name] = {"offset": offset, "size": len(blob),
+                                    "encoding": encoding, "buckets": buckets}
+        blobs.append(blob)
+        offset += len(blob)
+        if name == "raw":
+            sa = build_suffix_array(blob.decode(encoding), words).tobytes()
+            header["suffix_array"] = {"offset": offset, "size": len(sa)}
+            blobs.append(sa)
+            offset += len(sa)
+            order = array('i', sorted(range(len(words)),
+                                      key=words.__getitem__)).tobytes()
+            header["sorted_order"] = {"offset": offset, "size": len(order)}
+            blobs.append(order)
+            offset += len(order)
+
+    head = json.dumps(header).encode("utf-8")
+    # Pad so the data (and with it the suffix array) starts 8-byte aligned.
+    start = len(MAGIC) + 4 + len(head)
+    pad = -start % 8
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as out:
+        out.write(MAGIC)
+        out.write(struct.pack("<I", len(head) + pad))
+        out.write(head + b" " * pad)
+        for blob in blobs:
+            out.write(blob)
+    os.replace(tmp, path)
+    return path
+
+
+class CompiledDictionary:
+    """
+    Read-only, memory-mapped view of a compiled dictionary.
+
+    Nothing is decoded up front: sections, buckets and the suffix array are
+    sliced straight out of the mapping when asked for.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as infile:
+            self._mm = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a compiled dictionary: {path}")
+        (head_len,) = struct.unpack_from("<I", self._mm, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(self._mm[start:start + head_len])
+        self._base = start + head_len
+        self.source_sha256 = header["source_sha256"]
+        self.source_stat = header["source_stat"]
+        self._sections = header["sections"]
+        for section in self._sections.values():
+            section["buckets"] = {int(k): v for k, v in section["buckets"].items()}
+        self._suffix_array = header["suffix_array"]
+        self._sorted_order = header["sorted_order"]
+
+    def close(self):
+        self._mm.close()
+
+    def _slice(self, offset, size):
+        return self._mm[self._base + offset:self._base + offset + size]
+
+    def lengths(self, section):
+        """Word lengths present in `section`, ascending."""
+        return sorted(self._sections[section]["buckets"])
+
+    def text(self, section):
+        """The whole section as one string of SEP-terminated words."""
+        s = self._sections[section]
+        return self._slice(s["offset"], s["size"]).decode(s["encoding"])
+
+    def words(self, section):
+        """Every word in `section`, sorted by (length, word) (raw: file order)."""
+        return self.text(section).split(SEP)[:-1]
+
+    def bucket(self, section, length):
+        """The length-`length` words of `section`, sorted."""
+        s = self._sections[section]
+        b = s["buckets"].get(length)
+        if b is None:
+            return []
+        start, _, size = b
+        return self._slice(s["offset"] + start, size).decode(
+            s["encoding"]).split(SEP)[:-1]
+
+    def _ints(self, entry):
+        start = self._base + entry["offset"]
+        return memoryview(self._mm)[start:start + entry["size"]].cast('i')
+
+    def suffix_array(self):
+        """Sorted suffix offsets into `text("raw")`, as a zero-copy int view."""
+        return self._ints(self._suffix_array)
+
+    def sorted_order(self):
+        """Indices of the raw words in sorted word order, as a zero-copy view."""
+        return self._ints(self._sorted_order)
+
+
+# Loaded dictionaries by source path, so every consumer shares one mapping.
+_loaded = {}
+
+
+def source_stat(source_path):
+    """[size, mtime in ns] of a word list: changes whenever the file does."""
+    st = os.stat(source_path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def load_dictionary(source_path):
+    """
+    The compiled form of a word list, compiling it first if it is missing or
+    was built from a different version of the source file. The source is only
+    hashed when its size or mtime differ from those recorded (e.g. after a
+    fresh checkout), so an unchanged list is never read at all.
+    """
+    compiled = _loaded.get(source_path)
+    if compiled is not None:
+        return compiled
+    path = compiled_path(source_path)
+    try:
+        compiled = CompiledDictionary(path)
+    except (OSError, ValueError, KeyError):  # missing, or another format
+        compiled = None
+    if compiled is not None and (
+            compiled.source_stat != source_stat(source_path)
+            and compiled.source_sha256 != file_hash(source_path)):
+        compiled.close()  # Windows can't replace a file that is mapped
+        compiled = None
+    if compiled is None:
+        compile_dictionary(source_path, path)
+        compiled = CompiledDictionary(path)
+    _loaded[source_path] = compiled
+    return compiled
@@ -0,0 +1,104 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+from wordlist import load_dictionary
+
+
+class WordTrie:
+    """
+    In-process replacement for the C++ WordTrie service.
+
+    Answers the same prefix/suffix queries as `WordTrie/main.cc` against the same
+    word list, without a subprocess round trip or JSON encoding per query.
+
+    Prefixes are answered by bisecting the sorted word list. Suffixes follow the
+    C++ suffix trie, which stores *every* suffix of every word: a "suffix" query
+    therefore matches any substring, and its count is the number of suffixes that
+    start with it. Those are answered from a suffix array -- one int offset per
+    suffix into a single concatenated string -- rather than a million separate
+    suffix strings.
+
+    Words are stored exactly as the C++ trie stores them (stripped, not
+    lowercased), and the file is decoded as latin-1 so every byte maps to one
+    character, just like the `char`s the C++ trie walks. Everything is loaded
+    from the word list's compiled form (see `wordlist`), whose suffix array is
+    used in place without copying. Its raw section keeps the source's lines in
+    order, duplicates included, so counts and search indices are exactly the
+    C++ service's.
+    """
+
+    def __init__(self, file_path):
+        compiled = load_dictionary(file_path)
+        self._words = compiled.words("raw")
+        # Word indices in sorted word order, stored by the compiler: bisected
+        # in place, with no sort at startup.
+        self._order = compiled.sorted_order()
+        # The separator sorts below every character a query can contain, so a
+        # suffix that runs off the end of its word orders before any longer
+        # match -- which keeps the truncated keys used by `bisect` monotone.
+        self._text = compiled.text("raw")
+        self._suffixes = compiled.suffix_array()
+        self._owner = None  # offset -> word index, built on first search
+
+    def __len__(self):
+        return len(self._words)
+
+    def _prefix_range(self, prefix):
+        if not prefix:
+            return 0, 0  # the C++ trie never counts words at its root
+        words = self._words
+        lo = bisect_left(self._order, prefix, key=words.__getitem__)
+        hi = bisect_right(self._order, prefix + "\U0010ffff", lo,
+                          key=words.__getitem__)
+        return lo, hi
+
+    def _suffix_range(self, suffix):
+        if not suffix:
+            return 0, 0
+        text, n = self._text, len(suffix)
+
+        def key(offset):
+            return text[offset:offset + n]
+
+        lo = bisect_left(self._suffixes, suffix, key=key)
+        hi = bisect_right(self._suffixes, suffix, lo, key=key)
+        return lo, hi
+
+    def count_prefix(self, prefix):
+        """Number of words starting with `prefix`."""
+        lo, hi = self._prefix_range(prefix)
+        return hi - lo
+
+    def count_suffix(self, suffix):
+        """Number of word suffixes starting with `suffix` (i.e. occurrences)."""
+        lo, hi = self._suffix_range(suffix)
+        return hi - lo
+
+    def search_prefix(self, prefix):
+        """Sorted indices (into the source list) of words starting with `prefix`."""
+        lo, hi = self._prefix_range(prefix)
+        return sorted(self._order[lo:hi])
+
+    def search_suffix(self, suffix):
+        """Sorted indices (into the source list) of words containing `suffix`."""
+        if self._owner is None:
+            owner = array('i', bytes(4 * len(self._text)))
+            pos = 0
+            for i, w in enumerate(self._words):
+                owner[pos:pos + len(w) + 1] = array('i', [i] * (len(w) + 1))
+                pos += len(w) + 1
+            self._owner = owner
+        lo, hi = self._suffix_range(suffix)
+        return sorted({self._owner[self._suffixes[k]] for k in range(lo, hi)})
+
+    def query(self, command, type_, string):
+        """Answer a request in the same shape as the C++ service's JSON reply."""
+        if command == "count" and type_ == "prefix":
+            return {"count": self.count_prefix(string)}
+        if command == "count" and type_ == "suffix":
+            return {"count": self.count_suffix(string)}
+        if command == "search" and type_ == "prefix":
+            return self.search_prefix(string)
+        if command == "search" and type_ == "suffix":
+            return self.search_suffix(string)
+        return {"error": "Invalid command"}
@@ -1,33 +1,142 @@
-from utils import is_printable_ascii, valid_string, valid_res
+from utils import valid_tokens, plausible_slice, PLAUSIBLE_BYTES
+from wordtrie import WordTrie
+from querycache import QueryCache, file_hash
+from reconstruct import AdmissibleKeys
+import ngrams
 import subprocess
 import json
 import os
+import time
+import profiling
+
+# Word list answering the prefix/suffix queries -- the same file the C++ trie
+# loads.
+DICTIONARY = "dictionary/english-words.all"
+
+# Which trie answers queries: "python" (in-process, the default) or "exe" (the
+# external C++ service). Read from the environment so Pool workers, which
+# re-import this module, pick up the same choice.
+TRIE_BACKEND = os.environ.get("WORDTRIE_BACKEND", "python")
+
+# Resolve to an absolute path: Windows CreateProcess does not search the current
+# working directory for a bare filename, so passing just "WordTrie.exe" fails
+# unless it happens to be on PATH.
+WORDTRIE_EXE = os.path.abspath(os.environ.get("WORDTRIE_EXE", "WordTrie.exe"))
+
+# Built on first use rather than at import, so importing this module (e.g. in
+# every Pool worker) costs nothing until a query is actually made.
+_trie = None
+process = None
+
+
+def _start_process():
+    """Start the external C++ trie and discard its startup message."""
+    global process
+    process = subprocess.Popen(
+        WORDTRIE_EXE,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    startup_message = process.stdout.readline().strip()
+    print(f"Startup Message: {startup_message}")
+    return process
+
+
+def get_trie():
+    """The shared in-process WordTrie, loaded on first call."""
+    global _trie
+    if _trie is None:
+        _trie = WordTrie(DICTIONARY)
+    return _trie
 
-# Start the C++ process. Resolve to an absolute path: Windows CreateProcess does
-# not search the current working directory for a bare filename, so passing just
-# "WordTrie.exe" fails unless it happens to be on PATH.
-WORDTRIE_EXE = os.path.abspath("WordTrie.exe")
-process = subprocess.Popen(
-    WORDTRIE_EXE,
-    stdin=subprocess.PIPE,
-    stdout=subprocess.PIPE,
-    stderr=subprocess.PIPE,
-    text=True
-)
 
-# Read and discard the startup message
-startup_message = process.stdout.readline().strip()
-print(f"Startup Message: {startup_message}")
+# Memoize responses: crib-dragging issues the same prefix/suffix queries over
+# and over, and each one is a trie walk (or a subprocess round-trip). The cache
+# is bounded (LRU) and persisted per dictionary and backend, so repeated runs
+# -- and every Pool worker -- start warm. It is not shared while a Pool runs:
+# each worker has its own copy and doesn't see the others' new entries. When a
+# worker exits it writes just those entries to a part file of its own (no lock,
+# no rewrite of the snapshot), and the parent folds every part into the
+# snapshot once the Pool is done (see `merge_command_cache`). Set
+# WORDTRIE_CACHE_DIR to "" to keep it in memory.
+CACHE_SIZE = int(os.environ.get("WORDTRIE_CACHE_SIZE", 2_000_000))
+CACHE_DIR = os.environ.get("WORDTRIE_CACHE_DIR", ".cache")
+_command_cache = QueryCache(CACHE_SIZE)
+_cache_loaded = False
+
+
+def cache_path():
+    """
+    Where the query cache for the current dictionary and backend is persisted,
+    or None. The two backends are separate implementations, so neither is ever
+    served the other's answers.
+    """
+    if not CACHE_DIR:
+        return None
+    return os.path.join(CACHE_DIR, f"wordtrie-{TRIE_BACKEND}-"
+                                   f"{file_hash(DICTIONARY)[:16]}.pkl")
 
 
-# Memoize responses: crib-dragging issues the same prefix/suffix queries over
-# and over, and each one is a subprocess round-trip.
-_command_cache = {}
+def _load_cache():
+    global _cache_loaded
+    _cache_loaded = True
+    path = cache_path()
+    if path is not None:
+        _command_cache.load(path)
+
+
+def save_command_cache(part=False):
+    """
+    Merge this process's query cache into the on-disk snapshot, or with
+    part=True (in a Pool worker) just write its new entries to a part file.
+    """
+    path = cache_path()
+    if path is None or not len(_command_cache):
+        return None
+    if part:
+        return _command_cache.save_part(path)
+    return _command_cache.save(path)
+
+
+def merge_command_cache():
+    """
+    Fold the part files Pool workers left (see `save_command_cache`) into the
+    on-disk snapshot: one merge, in the parent, after the Pool has exited.
+    """
+    path = cache_path()
+    if path is None:
+        return None
+    return QueryCache(CACHE_SIZE).save(path)
+
+
+def command_cache_stats():
+    """Hit/miss/eviction counters and fill of this process's query cache."""
+    return _command_cache.stats()
+
+
+def clear_command_cache():
+    """Forget every cached query in this process (e.g. to time a cold run)."""
+    _command_cache.clear()
+
+
+def _check_reply(key, result):
+    """
+    Raise if the trie answered `key` with an {"error": ...} entry (a malformed
+    or unknown query) instead of a result; such replies are never cached.
+    """
+    if isinstance(result, dict) and "error" in result:
+        raise ValueError(f"Trie query {key!r} failed: {result['error']}")
+    return result
 
 
 def send_command(command, type_, string):
     """
-    Send a command to the C++ process and return the parsed JSON response.
+    Answer a trie query and return the result in the C++ service's JSON shape.
+
+    Queries go to the in-process WordTrie unless TRIE_BACKEND is "exe", in which
+    case they are sent as a JSON line to the external C++ process.
 
     Args:
         command (str): "search" or "count"
@@ -35,13 +144,30 @@ def send_command(command, type_, string):
         string (str): the input string to search/count
 
     Returns:
-        dict or list: JSON-decoded result from the C++ program
+        dict or list: {"count": n} for counts, a list of word indices for searches
     """
+    if not _cache_loaded:
+        _load_cache()
     key = (command, type_, string)
     cached = _command_cache.get(key)
+    if profiling.ENABLED:
+        profiling.count("trie.queries")
+        if cached is not None:
+            profiling.count("trie.cache_hits")
     if cached is not None:
         return cached
 
+    start = time.perf_counter() if profiling.ENABLED else 0.0
+    if TRIE_BACKEND != "exe":
+        result = _check_reply(key, get_trie().query(command, type_, string))
+        _command_cache.put(key, result)
+        if profiling.ENABLED:
+            profiling.add_time("trie.lookup", time.perf_counter() - start)
+        return result
+
+    if process is None:
+        _start_process()
+
     # Construct and send JSON input
     input_data = json.dumps({
         "command": command,
@@ -53,25 +179,88 @@ def send_command(command, type_, string):
 
     # Read and decode response
     response = process.stdout.readline()
-    result = json.loads(response)
-    _command_cache[key] = result
+    result = _check_reply(key, json.loads(response))
+    _command_cache.put(key, result)
+    if profiling.ENABLED:
+        profiling.add_time("trie.round_trip", time.perf_counter() - start)
     return result
 
 
+def send_commands(queries):
+    """
+    Answer a batch of trie queries at once.
+
+    Cached queries are answered locally; the rest are sent to the external C++
+    process as a single {"batch": [...]} request line and answered by a single
+    reply line, so a whole slice's tokens cost one round trip instead of one per
+    token. The in-process trie answers them directly.
+
+    Args:
+        queries (list): (command, type_, string) tuples, as for `send_command`.
+
+    Returns:
+        list: one result per query, in order.
+
+    Raises:
+        ValueError: if the trie reports an error for any query of the batch.
+    """
+    if not _cache_loaded:
+        _load_cache()
+    results = [_command_cache.get(key) for key in queries]
+    missing = [key for key, result in zip(queries, results) if result is None]
+    if profiling.ENABLED:
+        profiling.count("trie.queries", len(queries))
+        profiling.count("trie.cache_hits", len(queries) - len(missing))
+    if not missing:
+        return results
+
+    start = time.perf_counter() if profiling.ENABLED else 0.0
+    if TRIE_BACKEND != "exe":
+        trie = get_trie()
+        answers = [trie.query(*key) for key in missing]
+    else:
+        if process is None:
+            _start_process()
+        input_data = json.dumps({"batch": [
+            {"command": command, "type": type_, "string": string}
+            for command, type_, string in missing
+        ]})
+        process.stdin.write(input_data + "\n")
+        process.stdin.flush()
+        answers = json.loads(process.stdout.readline())
+        # A reply that couldn't be parsed as a batch is one error object.
+        if not isinstance(answers, list):
+            _check_reply(missing, answers)
+    for key, answer in zip(missing, answers):
+        _check_reply(key, answer)
+    if profiling.ENABLED:
+        profiling.add_time("trie.lookup" if TRIE_BACKEND != "exe"
+                           else "trie.round_trip", time.perf_counter() - start)
+
+    _command_cache.update(zip(missing, answers))
+    answered = dict(zip(missing, answers))
+    return [answered[key] if result is None else result
+            for key, result in zip(queries, results)]
+
+
 def xor(bytes_seq1, bytes_seq2):
     """
     XOR two byte sequences of equal length.
 
     Args:
-        bytes_seq1 (bytes): First byte sequence.
-        bytes_seq2 (bytes): Second byte sequence.
+        bytes_seq1 (bytes-like): First byte sequence.
+        bytes_seq2 (bytes-like): Second byte sequence.
 
     Returns:
         bytes: The XOR result as a bytes object.
     """
     if len(bytes_seq1) != len(bytes_seq2):
         raise ValueError("Both byte sequences must be of equal length.")
-    return bytes(b1 ^ b2 for b1, b2 in zip(bytes_seq1, bytes_seq2))
+    # XOR as one big integer rather than byte by byte; works on any bytes-like
+    # input, including memoryview windows of an XorMatrix.
+    return (int.from_bytes(bytes_seq1, "little") ^
+            int.from_bytes(bytes_seq2, "little")).to_bytes(len(bytes_seq1),
+                                                           "little")
 
 
 def generate_xor_labels(xor_data):
@@ -110,142 +299,281 @@ def generate_xor_labels(xor_data):
     return ", ".join(xor_labels)
 
 
-def generate_xor_data(ciphertexts):
-    xor_data = {}
-    for idx, ct in enumerate(ciphertexts):
-        if idx + 1 == len(ciphertexts):
-            break
-        xor_data.setdefault(f"p{idx+1}", {})
-        for jdx in range(idx + 1, len(ciphertexts)):
-            xor_data.setdefault(f"p{jdx+1}", {})
-            xor_data[f"p{idx+1}"][f"p{jdx+1}"] = {"name": f"x{idx+1}{jdx+1}",
-                                                  "result": xor(ct, ciphertexts[jdx])}
-            xor_data[f"p{jdx+1}"][f"p{idx+1}"] = {"name": f"x{idx+1}{jdx+1}",
-                                                  "result": xor(ct, ciphertexts[jdx])}
-    return xor_data
-
-
-def generate_xor_slices(xor_data, offset, crib_len):
+class XorMatrix:
+    """
+    Every pairwise XOR of a ciphertext set, in one contiguous store.
+
+    Only the upper triangle is kept: C_i ^ C_j == C_j ^ C_i, so each pair is
+    computed and stored once, as row `k` of a single bytes object of
+    (N choose 2) * L bytes. `pair` and `window` hand out memoryview slices of
+    that store, so reading a crib-sized window at some offset copies nothing.
+    Plaintexts are addressed by zero-based index; `labels` holds their "p1",
+    "p2", ... names.
     """
-    Generate an array of slices from XOR'd ciphertexts in a nested xor_data structure.
-
-    This function takes a nested dictionary of XOR'd ciphertext data, where the structure is:
-      {
-          "p1": {
-              "p2": {"name": "x12", "result": "xor_result_string"},
-              "p3": {"name": "x13", "result": "xor_result_string"}
-          },
-          "p2": {
-              "p1": {"name": "x12", "result": "xor_result_string"},
-              "p3": {"name": "x23", "result": "xor_result_string"}
-          },
-          "p3": {
-              "p1": {"name": "x13", "result": "xor_result_string"},
-              "p2": {"name": "x23", "result": "xor_result_string"}
-          }
-      }
-
-    The function extracts slices from the XOR'd ciphertexts (`result`), sliced from `offset`
-    to `offset + crib_len`.
 
-    Args:
-        xor_data (dict): A nested dictionary of XOR'd data.
-        offset (int): The starting index for the slice.
-        crib_len (int): The length of the slice.
+    def __init__(self, ciphertexts):
+        self.n = len(ciphertexts)
+        self.length = len(ciphertexts[0]) if ciphertexts else 0
+        if any(len(ct) != self.length for ct in ciphertexts):
+            raise ValueError("All ciphertexts must be of equal length.")
+        self.labels = [f"p{i+1}" for i in range(self.n)]
+        self._data = b"".join(xor(ciphertexts[i], ciphertexts[j])
+                              for i in range(self.n)
+                              for j in range(i + 1, self.n))
+        self._view = memoryview(self._data)
+
+    def __getstate__(self):
+        # memoryviews don't pickle; rebuild the view on the other side.
+        return {k: v for k, v in self.__dict__.items() if k != "_view"}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._view = memoryview(self._data)
+
+    def _row(self, i, j):
+        if i > j:
+            i, j = j, i
+        return i * self.n - i * (i + 1) // 2 + (j - i - 1)
+
+    def name(self, i, j):
+        """The pair's label, e.g. "x12" for plaintexts 0 and 1."""
+        i, j = min(i, j), max(i, j)
+        return f"x{i+1}{j+1}"
+
+    def others(self, i):
+        """Indices of every plaintext other than `i`."""
+        return [j for j in range(self.n) if j != i]
+
+    def pair(self, i, j):
+        """C_i ^ C_j as a zero-copy view."""
+        start = self._row(i, j) * self.length
+        return self._view[start:start + self.length]
+
+    def window(self, i, j, offset, length):
+        """(C_i ^ C_j)[offset:offset + length] as a zero-copy view."""
+        start = self._row(i, j) * self.length + offset
+        return self._view[start:start + length]
+
+    def derive(self, i, crib, offset):
+        """
+        (j, plaintext slice of j) for every other message j, if `crib` is the
+        plaintext of message `i` at `offset`.
+        """
+        for j in self.others(i):
+            yield j, xor(self.window(i, j, offset, len(crib)), crib)
+
+    def as_dict(self):
+        """
+        The nested {"p1": {"p2": {"name", "result"}}} form of the older helpers
+        (e.g. for printing). Copies every pair, once per direction.
+        """
+        xor_data = {}
+        for i, outer_key in enumerate(self.labels):
+            xor_data[outer_key] = {
+                self.labels[j]: {"name": self.name(i, j),
+                                 "result": bytes(self.pair(i, j))}
+                for j in self.others(i)
+            }
+        return xor_data
 
-    Returns:
-        list: A list of dictionaries, each containing the name and the sliced result.
-              Example: [{"name": "x12", "slice": "slice_data"}, ...]
+
+class CiphertextSet:
     """
-    xor_slices = {}
-    for outer_key in xor_data:
-        xor_slices.setdefault(outer_key, {})
-        for inner_key, details in xor_data[outer_key].items():
-            slice_result = details["result"][offset:offset + crib_len]
-            xor_slices[outer_key][inner_key] = {
-                "name": details["name"], "slice": slice_result}
-    # print(xor_slices)
-    return xor_slices
-
-
-def substring_in_xor_slices(xor_slices, substring, n):
+    The ciphertexts themselves, addressed like an XorMatrix but without its
+    pair store: N * L bytes instead of (N choose 2) * L.
+
+    Crib dragging only needs the plaintexts a crib placement implies, and they
+    follow from the placement alone: a crib at `offset` in message `i` fixes
+    the keystream there (crib ^ C_i), which decrypts every other message
+    directly -- N - 1 XORs per placement, and no pair ever has to exist.
+    `window` and `pair` still XOR a pair on demand for the older helpers.
+
+    The ciphertexts may differ in length (`length` is the longest): each pair
+    is restricted to its overlap, and a message that has ended by some column
+    says nothing about a crib placed there.
     """
-    Check if a substring exists in XOR results sharing a common number.
 
-    Args:
-        xor_slices (list): A list of dictionaries with keys:
-                           - "name": The XOR pair name (e.g., "x12").
-                           - "slice": The XOR result as a byte string.
-        substring (str): The substring to search for (in string format).
-        n (int): The total number of ciphertexts.
+    def __init__(self, ciphertexts):
+        self.n = len(ciphertexts)
+        self.length = max((len(ct) for ct in ciphertexts), default=0)
+        self.labels = [f"p{i+1}" for i in range(self.n)]
+        self.ciphertexts = [bytes(ct) for ct in ciphertexts]
+
+    def name(self, i, j):
+        """The pair's label, e.g. "x12" for plaintexts 0 and 1."""
+        i, j = min(i, j), max(i, j)
+        return f"x{i+1}{j+1}"
+
+    def others(self, i):
+        """Indices of every plaintext other than `i`."""
+        return [j for j in range(self.n) if j != i]
+
+    def pair(self, i, j):
+        """C_i ^ C_j over their overlap, computed on demand."""
+        return self.window(i, j, 0, self.length)
+
+    def window(self, i, j, offset, length):
+        """(C_i ^ C_j)[offset:offset + length] within their overlap."""
+        end = min(offset + length, len(self.ciphertexts[i]),
+                  len(self.ciphertexts[j]))
+        return xor(self.ciphertexts[i][offset:end],
+                   self.ciphertexts[j][offset:end])
+
+    def derive(self, i, crib, offset):
+        """
+        (j, plaintext slice of j) for every other message j, if `crib` is the
+        plaintext of message `i` at `offset`: the keystream hypothesis
+        crib ^ C_i, applied to each C_j in turn. A shorter C_j gets the part of
+        the slice it covers, and none at all if it ends before `offset`.
+        """
+        end = offset + len(crib)
+        if end > len(self.ciphertexts[i]):
+            raise ValueError("The crib runs past the end of its message.")
+        key = (int.from_bytes(self.ciphertexts[i][offset:end], "little") ^
+               int.from_bytes(crib, "little"))
+        for j in self.others(i):
+            window = self.ciphertexts[j][offset:end]
+            if window:
+                yield j, (int.from_bytes(window, "little") ^ key).to_bytes(
+                    len(crib), "little")[:len(window)]
 
-    Returns:
-        bool: True if the substring exists in at least two XORs involving one plaintext.
+
+def generate_xor_data(ciphertexts):
+    return XorMatrix(ciphertexts).as_dict()
+
+
+def byte_class_masks(matrix, allowed=PLAUSIBLE_BYTES):
     """
-    # Decode the substring to bytes for comparison
-    substring_bytes = substring.encode()
+    Precompute, for every XOR'd pair, which offsets each crib byte can sit at.
+
+    A crib byte `c` at position `p` derives the plaintext byte `result[p] ^ c`,
+    which is plausible only if it is in `allowed`. For every pair this returns
+    256 integers used as bit vectors: bit `p` of `masks[c]` is set when
+    `result[p] ^ c` is allowed. Checking a whole crib at *every* offset then
+    takes one shift and AND per crib byte (see `plausible_offsets`) instead of
+    XORing each window byte by byte.
 
-    num_to_xors = {i: [] for i in range(1, n + 1)}
+    Each pair of the XorMatrix is scanned once and its table shared by both
+    directions. A CiphertextSet has no pairs to scan; it gets the equivalent
+    one-table-per-message screen of `AdmissibleKeys.offset_masks` instead.
 
-    for xor_slice in xor_slices:
-        xor_name = xor_slice["name"]
-        xor_result = xor_slice["slice"]
+    Returns:
+        list: for each plaintext index `i`, the tables of its pairs with every
+              other plaintext, in `matrix.others(i)` order.
+    """
+    if isinstance(matrix, CiphertextSet):
+        return AdmissibleKeys.from_ciphertexts(
+            matrix.ciphertexts, allowed).offset_masks(matrix.ciphertexts)
+    tables = {}
+    for i in range(matrix.n):
+        for j in range(i + 1, matrix.n):
+            table = [0] * 256
+            for p, byte in enumerate(matrix.pair(i, j)):
+                bit = 1 << p
+                for a in allowed:
+                    table[a ^ byte] |= bit
+            tables[i, j] = tables[j, i] = table
+    return [[tables[i, j] for j in matrix.others(i)] for i in range(matrix.n)]
+
+
+def plausible_offsets(masks, crib, len_ct, skip=0):
+    """
+    Offsets at which `crib` derives plausible bytes in every other message.
 
-        numbers = [int(x) for x in xor_name[1:]]
+    Args:
+        masks (list): output of `byte_class_masks` (or the equivalent
+            `AdmissibleKeys.offset_masks`).
+        crib (bytes): the crib being dragged.
+        len_ct (int): ciphertext length.
+        skip (int): bit vector of columns whose key byte is already known
+            (e.g. `seeding.resolved_columns`); offsets where the crib would
+            lie entirely within them are not worth validating.
 
-        for num in numbers:
-            num_to_xors[num].append(xor_result)
+    Returns:
+        list: for each plaintext index the crib is assumed to belong to, a bit
+              vector of surviving offsets (0 if none survive).
+    """
+    max_offset = len_ct - len(crib) + 1
+    if max_offset <= 0:
+        return [0] * len(masks)
+    full = (1 << max_offset) - 1
+    if skip:
+        covered = skip
+        for j in range(1, len(crib)):
+            covered &= skip >> j
+        full &= ~covered
+    survivors = []
+    for inner in masks:
+        alive = full
+        for table in inner:
+            for j, crib_byte in enumerate(crib):
+                alive &= table[crib_byte] >> j
+                if not alive:
+                    break
+            if not alive:
+                break
+        survivors.append(alive)
+    return survivors
 
-    print(num_to_xors)
 
-    for num, xor_list in num_to_xors.items():
-        count = sum(
-            1 for xor_result in xor_list if substring_bytes in xor_result)
-        if count == n-1:
-            return True
+def iter_bits(mask):
+    """Yield the indices of the set bits of `mask` in ascending order."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
 
-    return False
 
+def potential_match(matrix, crib, offset, dict, outers=None):
+    """Check if a crib decrypts to potential matches in the XOR'd ciphertexts.
 
-def potential_match(xor_slices, crib, offset, dict):
-    """Check if a crib decrypts to potential matches in XOR slices.
+    Each (message, offset) placement is one keystream hypothesis: the
+    plaintext slices it implies for the other messages (see `derive`) are all
+    screened structurally, then scored by the character trigram model (see
+    `ngrams`), before any of them is looked up in the dictionary. A placement
+    whose slices score below `ngrams.MIN_SCORE` is rejected there, as is one
+    that no other message covers to the crib's end; a match carries its
+    "score" (mean log-probability per trigram, or None when the
+    slices are too short to score).
 
     Args:
-        xor_slices: Dictionary of XOR slices to check against
+        matrix: XorMatrix or CiphertextSet of the ciphertext set
         crib: Known plaintext string to search for
         offset: Starting position to consider in the slices
         dictionary: Dictionary for validation
+        outers: Plaintext indices to try the crib in (default: all)
 
     Returns:
         List of dictionaries containing potential matches with their details
     """
     results = []
-    for outer_key in xor_slices.keys():
-        # If `crib` really is the plaintext of `outer_key` at this offset, then
-        # xor(crib, slice_of(outer ^ inner)) reveals the plaintext slice of
-        # every other message. Collect those revealed slices keyed by inner_key.
-        derived = {}
-        p_match = True
-        for inner_key, details in xor_slices[outer_key].items():
-            pt_slice = xor(details["slice"], crib)
-            pt_words = pt_slice.split()
-            for idx, word in enumerate(pt_words):
-                if not idx:
-                    p_match = valid_string(send_command, pt_slice, word, dict)
-                else:
-                    p_match = valid_string(
-                        send_command, pt_slice, word, dict, "prefix")
-                if p_match == False:
-                    break
-            if not p_match:
-                break
-            derived[inner_key] = pt_slice
-        if p_match:
+    for outer in (range(matrix.n) if outers is None else outers):
+        outer_key = matrix.labels[outer]
+        # If `crib` really is the plaintext of `outer_key` at this offset, it
+        # reveals the plaintext slice of every other message. Collect those
+        # revealed slices keyed by inner_key; one that can't be English rules
+        # the placement out before any trie query is made.
+        derived = {matrix.labels[inner]: pt_slice
+                   for inner, pt_slice in matrix.derive(outer, crib, offset)}
+        # With ragged ciphertexts the crib may run past every other message;
+        # the columns no slice covers would be keyed on no evidence at all.
+        if not any(len(pt_slice) == len(crib) for pt_slice in derived.values()):
+            continue
+        if not all(map(plausible_slice, derived.values())):
+            continue
+        score = ngrams.get_model().mean_score(derived.values())
+        if score is not None and score < ngrams.MIN_SCORE:
+            if profiling.ENABLED:
+                profiling.count("drag.ngram_rejects")
+            continue
+        if all(valid_tokens(send_commands, pt_slice, dict)
+               for pt_slice in derived.values()):
             results.append({
                 "crib": crib.decode("utf-8", "replace"),
                 "plaintext": outer_key,
                 "start": offset,
                 "end": offset + len(crib),
+                "score": score,
                 # Revealed plaintext slices of the other messages, ready to be
                 # aggregated during reconstruction.
                 "derived": {